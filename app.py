@@ -4,7 +4,9 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
+from src.audit import audit_writer
 from src.auth import initialize_session
+from src.cancellation import begin_run
 from src.config import set_page_config, apply_custom_css
 from src.db import initialize_database
 from src.sidebar import render_advanced_sidebar
@@ -23,6 +25,8 @@ def main():
     set_page_config()
     apply_custom_css()
     initialize_database()
+    audit_writer.start()
+    begin_run()
     
     # Initialize session state
     if "auth_page" not in st.session_state:
@@ -0,0 +1,517 @@
+"""
+Performance Benchmarks
+Reproducible measurements for data-path changes, run against synthetic data
+"""
+
+import multiprocessing
+import resource
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import duckdb
+import pandas as pd
+
+from src.db import create_schema, get_sales_with_rls
+from src.maintenance import cluster_sales, zone_map_pruning
+
+
+REGIONS = ["North America", "Europe", "Asia Pacific", "Latin America"]
+
+
+def create_synthetic_sales(db, rows, products=200, users=500):
+    """Fill the products and sales tables with deterministic pseudo-random rows"""
+    regions = ", ".join(f"'{region}'" for region in REGIONS)
+    db.execute(f"""
+        INSERT INTO products (id, name, category, price, stock_quantity)
+        SELECT i + 1, 'Product ' || i, 'Category ' || (i % 10), CAST(9.99 + i AS DECIMAL(10, 2)), 100
+        FROM range({products}) t(i)
+    """)
+    db.execute(f"""
+        INSERT INTO sales (id, date, user_id, product_id, quantity, unit_price, total_amount, region)
+        SELECT
+            i,
+            DATE '2021-01-01' + CAST(hash(i) % 1461 AS INTEGER),
+            1 + CAST(hash(i * 31) % {users} AS INTEGER),
+            1 + CAST(hash(i * 17) % {products} AS INTEGER),
+            1 + CAST(i % 10 AS INTEGER),
+            CAST(9.99 + (hash(i * 17) % {products}) AS DECIMAL(10, 2)),
+            CAST((9.99 + (hash(i * 17) % {products})) * (1 + i % 10) AS DECIMAL(10, 2)),
+            list_extract([{regions}], 1 + CAST(hash(i * 7) % {len(REGIONS)} AS INTEGER))
+        FROM range(1, {rows} + 1) t(i)
+    """)
+
+
+def open_synthetic_db(tmp_dir, rows):
+    db = duckdb.connect(str(Path(tmp_dir) / "bench.duckdb"))
+    create_schema(db)
+    create_synthetic_sales(db, rows)
+    return db
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+# ============= BENCHMARKS =============
+
+def bench_session_memory(rows=1_000_000, sessions=50):
+    """Per-session memory of the sales frame: legacy SELECT * vs compact frames"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = open_synthetic_db(tmp_dir, rows)
+        
+        start = time.perf_counter()
+        legacy = db.execute("SELECT * EXCLUDE (year, month) FROM sales_all ORDER BY date DESC").df()
+        legacy_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        compact = get_sales_with_rls(db, "admin", 1)
+        compact_time = time.perf_counter() - start
+        
+        analytics = get_sales_with_rls(
+            db, "admin", 1,
+            columns=("date", "product_name", "quantity", "total_amount", "region")
+        )
+        
+        db.close()
+    
+    results = [
+        ("legacy SELECT *", frame_bytes(legacy), legacy_time),
+        ("compact, all columns", frame_bytes(compact), compact_time),
+        ("compact, analytics columns", frame_bytes(analytics), None),
+    ]
+    
+    baseline = results[0][1]
+    print(f"Session memory for {rows:,} sales rows ({sessions} sessions)")
+    for name, size, elapsed in results:
+        timing = f"{elapsed:6.2f}s" if elapsed is not None else "      -"
+        print(
+            f"  {name:<28} {size / 1024 / 1024:9.1f} MB/session  "
+            f"{size * sessions / 1024 / 1024 / 1024:6.2f} GB total  "
+            f"{1 - size / baseline:6.1%} saved  {timing}"
+        )
+    
+    return results
+
+
+def bench_zone_maps(rows=5_000_000, user_id=42):
+    """Row groups skipped by the manager and user RLS predicates, before and after clustering"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = open_synthetic_db(tmp_dir, rows)
+        db.execute("CHECKPOINT")
+        
+        # Synthetic dates end in 2024, so anchor the manager window on the newest sale
+        cutoff = db.execute("SELECT MAX(date) - INTERVAL 90 DAY FROM sales").fetchone()[0].date()
+        predicates = [
+            ("manager: date >= max - 90d", "date", {"low": cutoff}, "s.date >= ?", [cutoff]),
+            (f"user: user_id = {user_id}", "user_id", {"low": user_id, "high": user_id}, "s.user_id = ?", [user_id]),
+        ]
+        
+        def measure(label):
+            print(label)
+            for name, column, bounds, where, params in predicates:
+                pruning = zone_map_pruning(db, "sales", column, **bounds)
+                start = time.perf_counter()
+                db.execute(f"SELECT SUM(s.total_amount) FROM sales s WHERE {where}", params).fetchone()
+                elapsed = time.perf_counter() - start
+                print(
+                    f"  {name:<28} {pruning['skipped']:4d} / {pruning['row_groups']:4d} row groups skipped  "
+                    f"{elapsed * 1000:8.1f} ms"
+                )
+        
+        measure(f"Unclustered ({rows:,} rows, random date order)")
+        result = cluster_sales(db)
+        measure(f"Clustered by (date, user_id) in {result['seconds']:.1f}s")
+        
+        db.close()
+
+
+def bench_shopify_sync(orders=20_000, latency_ms=50, windows=(1, 4, 8)):
+    """Orders/s through the paginated Shopify sync against the local mock, by number of date windows"""
+    from scripts.enterprise_integrations import ShopifyConnector
+    from scripts.mock_servers import MockShopify, start_mock_server
+    
+    mock = MockShopify(orders=orders, days=7, latency=latency_ms / 1000)
+    server, base_url = start_mock_server(mock)
+    
+    print(f"Shopify sync of {orders:,} mock orders ({latency_ms:.0f} ms per request)")
+    try:
+        for window_count in windows:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                db = duckdb.connect(str(Path(tmp_dir) / "bench.duckdb"))
+                create_schema(db)
+                
+                connector = ShopifyConnector(base_url, "mock-token", max_requests_per_second=1000)
+                stats = connector.sync_orders(db, days_back=8, windows=window_count)
+                db.close()
+            
+            print(
+                f"  {window_count:2d} windows  {stats['pages']:4d} pages  {stats['sales']:7,} sales  "
+                f"{stats['seconds']:6.2f}s  {stats['orders'] / stats['seconds']:9,.0f} orders/s"
+            )
+    finally:
+        server.shutdown()
+
+
+def bench_crm_sync(records=20_000, latency_ms=50, partitions=(1, 4, 8)):
+    """
+    Records/s staged from the mock Salesforce and HubSpot APIs, by number of
+    modified-date partitions. The HubSpot single-partition run walks the
+    list endpoint, since one search query cannot page past 10,000 results.
+    """
+    from scripts.enterprise_integrations import HubSpotConnector, SalesforceConnector
+    from scripts.mock_servers import MockHubSpot, MockSalesforce, start_mock_server
+    
+    server, base_url = start_mock_server(
+        salesforce=MockSalesforce(records, days=7, latency=latency_ms / 1000),
+        hubspot=MockHubSpot(records, days=7, latency=latency_ms / 1000)
+    )
+    
+    syncs = {
+        'salesforce': lambda db, count: SalesforceConnector(
+            base_url, "mock-id", "mock-secret", max_requests_per_second=1000
+        ).sync_opportunities(db, days_back=8, partitions=count),
+        'hubspot': lambda db, count: HubSpotConnector(
+            "mock-token", base_url, max_requests_per_second=1000
+        ).sync_deals(db, days_back=8 if count > 1 else None, partitions=count)
+    }
+    
+    print(f"CRM sync of {records:,} mock records per source ({latency_ms:.0f} ms per request)")
+    try:
+        for source, sync in syncs.items():
+            for count in partitions:
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    db = duckdb.connect(str(Path(tmp_dir) / "bench.duckdb"))
+                    stats = sync(db, count)
+                    db.close()
+                
+                print(
+                    f"  {source:<10} {count:2d} partitions  {stats['pages']:4d} pages  {stats['rows']:7,} rows  "
+                    f"{stats['seconds']:6.2f}s  {stats['records'] / stats['seconds']:9,.0f} records/s"
+                )
+    finally:
+        server.shutdown()
+
+
+def bench_backup(rows=5_000_000, new_rows=20_000):
+    """
+    Nightly backup cost against the local S3 stand-in: the old full-file copy
+    and upload, a first Parquet snapshot, an incremental one after a day of
+    new sales, and a restore of that snapshot from S3
+    """
+    import os
+    import shutil
+    from scripts.mock_servers import MockS3, start_mock_server
+    from src.backup import S3BackupStore, backup_database, restore_database
+    
+    for name, value in [("AWS_ACCESS_KEY_ID", "mock"), ("AWS_SECRET_ACCESS_KEY", "mock"),
+                        ("AWS_DEFAULT_REGION", "us-east-1")]:
+        os.environ.setdefault(name, value)
+    
+    mock = MockS3()
+    server, base_url = start_mock_server(s3=mock)
+    
+    def report(label, seconds, shipped):
+        print(f"  {label:<22} {seconds:7.2f}s  {shipped / 1024 / 1024:9.1f} MB shipped")
+    
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = open_synthetic_db(tmp_dir, rows)
+            db.execute("CHECKPOINT")
+            db_path = Path(tmp_dir) / "bench.duckdb"
+            cold_dir = Path(tmp_dir) / "cold"
+            
+            s3 = S3BackupStore("backups", "dashboard", endpoint_url=f"{base_url}/s3")
+            s3.client.create_bucket(Bucket="backups")
+            stores = [s3]
+            
+            print(f"Backups of {rows:,} sales rows ({db_path.stat().st_size / 1024 / 1024:.0f} MB database file)")
+            
+            start = time.perf_counter()
+            copy_path = Path(tmp_dir) / "copy.duckdb"
+            shutil.copy(db_path, copy_path)
+            s3.client.upload_file(str(copy_path), "backups", "dashboard/copy.duckdb")
+            report("file copy + upload", time.perf_counter() - start, copy_path.stat().st_size)
+            copy_path.unlink()
+            
+            full = backup_database(db, stores, str(cold_dir))
+            report("snapshot (first)", full["seconds"], full["uploaded_bytes"])
+            
+            # A day of new sales lands in the latest month only
+            db.execute(f"""
+                INSERT INTO sales (id, date, user_id, product_id, quantity, unit_price, total_amount, region)
+                SELECT (SELECT MAX(id) FROM sales) + i, (SELECT MAX(date) FROM sales), 1 + i % 500, 1 + i % 200,
+                       1, 9.99, 9.99, 'Europe'
+                FROM range(1, {new_rows} + 1) t(i)
+            """)
+            incremental = backup_database(db, stores, str(cold_dir))
+            report(f"snapshot (+{new_rows:,} rows)", incremental["seconds"], incremental["uploaded_bytes"])
+            print(f"    {incremental['uploaded_objects']} of {incremental['objects']} partitions changed")
+            
+            expected = db.execute("SELECT COUNT(*), SUM(total_amount) FROM sales").fetchone()
+            db.close()
+            
+            restored_path = Path(tmp_dir) / "restored.duckdb"
+            restored = restore_database(s3, str(restored_path))
+            print(
+                f"  {'restore from S3':<22} {restored['seconds']:7.2f}s  "
+                f"(download {restored['download_seconds']:.2f}s, load {restored['load_seconds']:.2f}s)"
+            )
+            
+            check = duckdb.connect(str(restored_path))
+            actual = check.execute("SELECT COUNT(*), SUM(total_amount) FROM sales").fetchone()
+            check.close()
+            print(f"  restored sales match: {actual == expected} {actual}")
+    finally:
+        server.shutdown()
+
+
+def load_isolated(tmp_dir, label, run):
+    """Run run(db) on a fresh database in a child process and print rows/s and that process's peak RSS"""
+    results = multiprocessing.get_context("fork").Queue()
+    
+    def child():
+        db = duckdb.connect(str(Path(tmp_dir) / f"{label}.duckdb"))
+        create_schema(db)
+        start = time.perf_counter()
+        loaded = run(db)
+        elapsed = time.perf_counter() - start
+        db.close()
+        results.put((loaded, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+    
+    process = multiprocessing.get_context("fork").Process(target=child)
+    process.start()
+    loaded, elapsed, peak_mb = results.get()
+    process.join()
+    print(
+        f"  {label:<16} {loaded:12,} rows  {elapsed:7.1f}s  {loaded / elapsed:12,.0f} rows/s  "
+        f"peak {peak_mb:7,.0f} MB"
+    )
+
+
+def bench_file_import(rows=10_000_000, chunk_rows=500_000):
+    """
+    Rows/s loading scripts/example_sales_import.csv scaled up to rows, through
+    pandas (whole file, then chunked) and through DuckDB's native CSV scan
+    """
+    from scripts.enterprise_integrations import FileConnector
+    from src.db import bulk_insert_sales
+    
+    example = Path(__file__).parent / "example_sales_import.csv"
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_path = str(Path(tmp_dir) / "sales.csv")
+        scratch = duckdb.connect()
+        # Repeat the example rows, spreading copies over the following days and users
+        scratch.execute(f"""
+            COPY (
+                SELECT
+                    CAST(e.date AS DATE) + CAST(r.range % 365 AS INTEGER) AS date,
+                    e.user_id + CAST(r.range % 100 AS INTEGER) * 10 AS user_id,
+                    e.product_name, e.quantity, e.unit_price, e.total_amount, e.region
+                FROM read_csv_auto('{example.as_posix()}') e, range(CAST(CEIL(? / (SELECT COUNT(*) FROM read_csv_auto('{example.as_posix()}'))) AS BIGINT)) r
+                LIMIT ?
+            ) TO '{csv_path}' (HEADER)
+        """, [rows, rows])
+        scratch.close()
+        
+        size_mb = Path(csv_path).stat().st_size / 1024 / 1024
+        print(f"File import of {rows:,} rows ({size_mb:,.0f} MB CSV)")
+        
+        load_isolated(tmp_dir, "pandas", lambda db: bulk_insert_sales(db, pd.read_csv(csv_path)))
+        load_isolated(tmp_dir, "pandas chunked", lambda db: sum(
+            bulk_insert_sales(db, chunk) for chunk, _ in FileConnector.iter_csv(csv_path, chunk_rows)
+        ))
+        load_isolated(tmp_dir, "duckdb native", lambda db: FileConnector.load_sales_native(db, csv_path)["rows"])
+
+
+def bench_sql_sync(rows=2_000_000, chunk_rows=100_000, queries=200):
+    """
+    SQLite stand-in for the warehouse: whole-result read_sql on a fresh engine
+    against chunked streaming from the pooled engine, then small-query latency
+    with an engine per call against the shared pool
+    """
+    import sqlite3
+    from sqlalchemy import create_engine
+    from scripts.enterprise_integrations import SQLDatabaseConnector
+    from src.db import bulk_insert_sales
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sqlite_path = Path(tmp_dir) / "warehouse.db"
+        url = f"sqlite:///{sqlite_path}"
+        products = ["Laptop", "Monitor", "Keyboard", "Mouse"]
+        
+        warehouse = sqlite3.connect(sqlite_path)
+        warehouse.execute(
+            "CREATE TABLE sales (date TEXT, user_id INTEGER, product_name TEXT, quantity INTEGER, "
+            "unit_price REAL, total_amount REAL, region TEXT)"
+        )
+        warehouse.executemany("INSERT INTO sales VALUES (?, ?, ?, ?, ?, ?, ?)", (
+            (f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}", 1 + i % 1000, products[i % 4], 1 + i % 5, 9.99,
+             9.99 * (1 + i % 5), "EU") for i in range(rows)
+        ))
+        warehouse.commit()
+        warehouse.close()
+        
+        query = "SELECT * FROM sales"
+        print(f"SQL sync of {rows:,} rows from SQLite")
+        load_isolated(tmp_dir, "read_sql", lambda db: bulk_insert_sales(db, pd.read_sql(query, create_engine(url))))
+        load_isolated(tmp_dir, "streamed", lambda db: SQLDatabaseConnector(url, chunk_rows).sync_query(db, query)["rows"])
+        
+        small = "SELECT * FROM sales WHERE rowid = 42"
+        start = time.perf_counter()
+        for _ in range(queries):
+            engine = create_engine(url)
+            pd.read_sql(small, engine)
+            engine.dispose()
+        per_call = (time.perf_counter() - start) / queries
+        
+        connector = SQLDatabaseConnector(url)
+        start = time.perf_counter()
+        for _ in range(queries):
+            connector.fetch_data(small)
+        pooled = (time.perf_counter() - start) / queries
+        SQLDatabaseConnector.dispose_engines()
+        
+        print(f"  {queries} small queries: engine per call {per_call * 1000:6.2f} ms, pooled {pooled * 1000:6.2f} ms")
+
+
+def bench_transforms(line_items=1_000_000):
+    """
+    Connector payload to sales rows: the per-row dict loops the connectors
+    used before against the Arrow transforms, alone and through bulk_insert_sales
+    """
+    from datetime import datetime
+    from scripts.enterprise_integrations import shopify_orders_to_sales, stripe_charges_to_sales
+    from scripts.mock_servers import MockShopify
+    from src.db import bulk_insert_sales
+    
+    def shopify_dicts(orders):
+        sales = []
+        for order in orders:
+            for line_item in order['line_items']:
+                sales.append({
+                    'date': order['created_at'][:10],
+                    'user_id': order.get('customer', {}).get('id', 0),
+                    'product_name': line_item['name'],
+                    'quantity': line_item['quantity'],
+                    'unit_price': float(line_item['price']),
+                    'total_amount': float(line_item['quantity']) * float(line_item['price']),
+                    'region': order.get('shipping_address', {}).get('country', 'Unknown')
+                })
+        return sales
+    
+    def stripe_dicts(charges):
+        return [{
+            'date': datetime.fromtimestamp(charge['created']).date(),
+            'user_id': 0,
+            'product_name': charge.get('description') or 'Stripe Payment',
+            'quantity': 1,
+            'unit_price': charge['amount'] / 100,
+            'total_amount': charge['amount'] / 100,
+            'region': charge.get('billing_details', {}).get('address', {}).get('country', 'Unknown')
+        } for charge in charges if charge['status'] == 'succeeded']
+    
+    # Mock orders average two line items each
+    mock = MockShopify(orders=line_items // 2, days=30)
+    orders = [mock.order(i) for i in range(line_items // 2)]
+    charges = [{
+        'status': 'succeeded' if i % 10 else 'failed',
+        'created': 1_700_000_000 + i * 60,
+        'customer': None,
+        'description': ['Pro plan', 'Team plan', None][i % 3],
+        'amount': 1_000 + i % 5_000,
+        'billing_details': {'address': {'country': ['US', 'DE', 'JP'][i % 3]}}
+    } for i in range(line_items)]
+    
+    print(f"Transforms: {len(orders):,} Shopify orders and {len(charges):,} Stripe charges")
+    for label, payload, legacy, arrow in [
+        ("shopify", orders, shopify_dicts, shopify_orders_to_sales),
+        ("stripe", charges, stripe_dicts, stripe_charges_to_sales),
+    ]:
+        timings = {}
+        for path, transform, to_frame in [("dicts", legacy, pd.DataFrame), ("arrow", arrow, lambda table: table)]:
+            db = duckdb.connect()
+            create_schema(db)
+            start = time.perf_counter()
+            sales = transform(payload)
+            transformed = time.perf_counter() - start
+            rows = bulk_insert_sales(db, to_frame(sales))
+            timings[path] = (rows, transformed, time.perf_counter() - start)
+            db.close()
+        
+        for path, (rows, transformed, total) in timings.items():
+            print(
+                f"  {label:<8} {path:<6} {rows:10,} rows  transform {transformed:6.2f}s "
+                f"({rows / transformed:12,.0f} rows/s)  with insert {total:6.2f}s"
+            )
+
+
+# ============= COMMAND LINE INTERFACE =============
+
+if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Dashboard Performance Benchmarks')
+    subparsers = parser.add_subparsers(dest='command')
+    
+    memory_parser = subparsers.add_parser('memory', help='Per-session sales frame memory')
+    memory_parser.add_argument('--rows', type=int, default=1_000_000, help='Synthetic sales rows')
+    memory_parser.add_argument('--sessions', type=int, default=50, help='Concurrent sessions to project')
+    
+    zonemap_parser = subparsers.add_parser('zonemaps', help='Row-group pruning for RLS predicates')
+    zonemap_parser.add_argument('--rows', type=int, default=5_000_000, help='Synthetic sales rows')
+    zonemap_parser.add_argument('--user-id', type=int, default=42, help='User for the user-role predicate')
+    
+    shopify_parser = subparsers.add_parser('shopify', help='Shopify sync throughput against the mock API')
+    shopify_parser.add_argument('--orders', type=int, default=20_000, help='Mock orders')
+    shopify_parser.add_argument('--latency-ms', type=float, default=50, help='Mock latency per request')
+    
+    crm_parser = subparsers.add_parser('crm', help='Salesforce/HubSpot sync throughput against the mock APIs')
+    crm_parser.add_argument('--records', type=int, default=20_000, help='Mock opportunities and deals')
+    crm_parser.add_argument('--latency-ms', type=float, default=50, help='Mock latency per request')
+    
+    backup_parser = subparsers.add_parser('backup', help='Incremental Parquet backups and restore, S3 stand-in')
+    backup_parser.add_argument('--rows', type=int, default=5_000_000, help='Synthetic sales rows')
+    
+    files_parser = subparsers.add_parser('files', help='CSV import throughput: pandas vs native DuckDB scan')
+    files_parser.add_argument('--rows', type=int, default=10_000_000, help='Rows in the scaled example CSV')
+    
+    sql_parser = subparsers.add_parser('sql', help='SQL connector: read_sql vs pooled streaming, SQLite stand-in')
+    sql_parser.add_argument('--rows', type=int, default=2_000_000, help='Rows in the SQLite sales table')
+    
+    transform_parser = subparsers.add_parser('transforms', help='Connector payload transforms: dict loops vs Arrow')
+    transform_parser.add_argument('--line-items', type=int, default=1_000_000, help='Synthetic line items / charges')
+    
+    args = parser.parse_args()
+    
+    if args.command == 'memory':
+        bench_session_memory(args.rows, args.sessions)
+    
+    elif args.command == 'zonemaps':
+        bench_zone_maps(args.rows, args.user_id)
+    
+    elif args.command == 'shopify':
+        bench_shopify_sync(args.orders, args.latency_ms)
+    
+    elif args.command == 'crm':
+        bench_crm_sync(args.records, args.latency_ms)
+    
+    elif args.command == 'backup':
+        bench_backup(args.rows)
+    
+    elif args.command == 'files':
+        bench_file_import(args.rows)
+    
+    elif args.command == 'sql':
+        bench_sql_sync(args.rows)
+    
+    elif args.command == 'transforms':
+        bench_transforms(args.line_items)
+    
+    else:
+        parser.print_help()
@@ -5,6 +5,7 @@ Handles scheduled data imports from external sources
 
 import os
 import sys
+import time
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -16,8 +17,18 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 import pandas as pd
 import duckdb
 from apscheduler.schedulers.background import BackgroundScheduler
-import requests
-import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+from src.config import BACKUP_DIR, BACKUP_RETENTION_DAYS, DUCKDB_SETTINGS, IMPORT_CHUNK_ROWS
+from src.backup import (
+    LocalBackupStore, S3BackupStore, backup_database, backup_stores, list_backups, prune_backups, restore_database
+)
+from src.auth import hash_password
+from src.db import bulk_insert_sales, bulk_insert_users, new_users, refresh_sales_cube
+from scripts.http_client import HTTPClient
+from src.maintenance import (
+    apply_audit_retention, checkpoint, compact_database, storage_stats, tier_closed_months
+)
 
 # Configure logging
 logging.basicConfig(
@@ -37,10 +48,12 @@ class ProductionDataSync:
     def __init__(self, db_path='data/dashboard.duckdb'):
         self.db_path = db_path
         self.scheduler = None
-        
+        # Reused across scheduled runs so connections stay alive and ETags can short-circuit unchanged data
+        self.api_client = HTTPClient('sales_api')
+    
     def get_db(self):
         """Get database connection"""
-        return duckdb.connect(self.db_path)
+        return duckdb.connect(self.db_path, config=DUCKDB_SETTINGS)
     
     # ============= SALES DATA SYNC =============
     
@@ -68,8 +81,10 @@ class ProductionDataSync:
                 'end_date': end_date.isoformat()
             }
             
-            response = requests.get(api_url, params=params, timeout=30)
-            response.raise_for_status()
+            response = self.api_client.get(api_url, params=params, revalidate=True)
+            if response.not_modified:
+                logger.info("✅ Sales API reports no changes since the last sync")
+                return 0
             
             sales_data = response.json()
             logger.info(f"Retrieved {len(sales_data)} records from API")
@@ -80,87 +95,135 @@ class ProductionDataSync:
             # Data quality checks
             self._validate_sales_data(df)
             
-            # Insert into database
+            # Insert into database, appended in date order
             db = self.get_db()
-            count = 0
-            
-            for _, row in df.iterrows():
-                try:
-                    db.execute("""
-                        INSERT INTO sales 
-                        (date, user_id, product_name, quantity, unit_price, total_amount, region)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, [
-                        row['date'],
-                        row['user_id'],
-                        row['product_name'],
-                        int(row['quantity']),
-                        float(row['unit_price']),
-                        float(row['total_amount']),
-                        row['region']
-                    ])
-                    count += 1
-                except Exception as e:
-                    logger.warning(f"Failed to insert record: {e}")
-                    continue
-            
+            count = bulk_insert_sales(db, df)
             db.commit()
+            refresh_sales_cube(db)
             db.close()
             
             logger.info(f"✅ Successfully synced {count} sales records")
             return count
-            
+        
         except Exception as e:
             logger.error(f"❌ Sales sync failed: {e}")
             raise
     
-    def sync_sales_from_csv(self, file_path):
+    def sync_sales_from_csv(self, file_path, restart=False):
         """
         Bulk import sales data from CSV file
         
         Args:
             file_path: Path to CSV file
+            restart: Ignore progress saved by an interrupted import of this path
+        """
+        return self.import_sales_file(file_path, restart=restart)
+    
+    def import_sales_file(self, file_path, chunk_rows=IMPORT_CHUNK_ROWS, restart=False):
         """
+        Stream a CSV or Parquet file of sales into the database chunk by chunk,
+        so memory stays bounded by chunk_rows whatever the file size.
+        
+        Each chunk is validated and committed together with the row offset
+        reached in import_progress, so a failed or killed import resumes from
+        the last committed chunk when run again on the same path. A finished
+        import clears its progress, so the path can be imported again.
+        
+        Args:
+            file_path: Path to a .csv or .parquet file
+            chunk_rows: Rows read, validated and inserted per transaction
+            restart: Ignore saved progress and load the file from the start;
+                     required when the file changed since an interrupted import
+        """
+        from scripts.enterprise_integrations import FileConnector
+        
         try:
-            logger.info(f"Importing sales from CSV: {file_path}")
-            
-            if not os.path.exists(file_path):
+            path = Path(file_path).resolve()
+            if not path.exists():
                 raise FileNotFoundError(f"File not found: {file_path}")
             
-            # Read CSV
-            df = pd.read_csv(file_path)
-            
-            # Validate
-            self._validate_sales_data(df)
-            
-            # Insert
+            stat = path.stat()
             db = self.get_db()
-            count = 0
-            
-            for _, row in df.iterrows():
-                db.execute("""
-                    INSERT INTO sales 
-                    (date, user_id, product_name, quantity, unit_price, total_amount, region)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, [
-                    row['date'],
-                    row['user_id'],
-                    row['product_name'],
-                    int(row['quantity']),
-                    float(row['unit_price']),
-                    float(row['total_amount']),
-                    row['region']
-                ])
-                count += 1
-            
-            db.commit()
-            db.close()
-            
-            logger.info(f"✅ Successfully imported {count} records from CSV")
+            try:
+                offset = 0
+                saved = db.execute(
+                    "SELECT file_size, file_mtime, rows_loaded FROM import_progress WHERE file_path = ?", [str(path)]
+                ).fetchone()
+                if saved and not restart:
+                    # The saved offset only means something for the exact file it was counted in
+                    if (saved[0], saved[1]) != (stat.st_size, stat.st_mtime):
+                        raise ValueError(
+                            f"{path.name} changed since the import that loaded {saved[2]:,} of its rows "
+                            f"(size or modification time differs), so resuming could skip or duplicate rows. "
+                            f"Run again with --restart to load it from the start"
+                        )
+                    offset = saved[2]
+                    logger.info(f"Resuming {path.name} after row {offset:,}")
+                else:
+                    logger.info(f"Importing sales from {path}")
+                
+                start = time.perf_counter()
+                count = 0
+                for chunk, done in FileConnector.iter_file(path, chunk_rows, offset):
+                    # Resuming an import that was killed after its last chunk reads nothing
+                    if chunk.empty:
+                        continue
+                    try:
+                        self._validate_sales_data(chunk)
+                    except ValueError as e:
+                        raise ValueError(f"Rows {offset + 1:,}-{offset + len(chunk):,}: {e}") from e
+                    
+                    db.execute("BEGIN TRANSACTION")
+                    try:
+                        count += bulk_insert_sales(db, chunk)
+                        offset += len(chunk)
+                        db.execute("""
+                            INSERT OR REPLACE INTO import_progress (file_path, file_size, file_mtime, rows_loaded, updated_at)
+                            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                        """, [str(path), stat.st_size, stat.st_mtime, offset])
+                        db.execute("COMMIT")
+                    except Exception:
+                        db.execute("ROLLBACK")
+                        raise
+                    
+                    elapsed = time.perf_counter() - start
+                    logger.info(f"  {done:6.1%}  {offset:,} rows  {count / elapsed:,.0f} rows/s")
+                
+                db.execute("DELETE FROM import_progress WHERE file_path = ?", [str(path)])
+                refresh_sales_cube(db)
+            finally:
+                db.close()
+            
+            logger.info(f"✅ Successfully imported {count} records from {path.name}")
             return count
+        
+        except Exception as e:
+            logger.error(f"❌ File import failed: {e}")
+            raise
+    
+    def import_sales_native(self, source, file_format=None):
+        """
+        Load CSV, Parquet or JSON sales files (a path or glob) with DuckDB's own
+        scanners in one transaction. Much faster than import_sales_file, but
+        all-or-nothing rather than resumable.
+        """
+        from scripts.enterprise_integrations import FileConnector
+        
+        try:
+            logger.info(f"Importing sales natively from {source}")
             
+            db = self.get_db()
+            try:
+                result = FileConnector.load_sales_native(db, source, file_format)
+                refresh_sales_cube(db)
+            finally:
+                db.close()
+            
+            logger.info(f"✅ Successfully imported {result['rows']} records in {result['seconds']:.1f}s")
+            return result['rows']
+        
         except Exception as e:
-            logger.error(f"❌ CSV import failed: {e}")
+            logger.error(f"❌ Native import failed: {e}")
             raise
     
     def _validate_sales_data(self, df):
@@ -190,13 +253,20 @@ class ProductionDataSync:
     
     # ============= USER MANAGEMENT SYNC =============
     
-    def sync_users_from_csv(self, file_path):
+    def sync_users_from_csv(self, file_path, workers=None):
         """
         Bulk import users from CSV
         
         File format:
         username,email,role,initial_password
         john_doe,john@company.com,user,TempPass123!
+        
+        Existing usernames and emails are filtered out with one anti-join,
+        passwords are hashed across a process pool (the KDF is deliberately
+        slow), and all new users are inserted in one transaction.
+        
+        Returns:
+            dict: created, duplicates and invalid row counts
         """
         try:
             logger.info(f"Importing users from CSV: {file_path}")
@@ -204,59 +274,61 @@ class ProductionDataSync:
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"File not found: {file_path}")
             
-            df = pd.read_csv(file_path)
+            start = time.perf_counter()
+            df = pd.read_csv(file_path, dtype=str)
+            total = len(df)
             
-            db = self.get_db()
-            count = 0
-            skipped = 0
+            if 'role' not in df.columns:
+                df['role'] = 'user'
+            if 'initial_password' not in df.columns:
+                df['initial_password'] = None
             
-            for _, row in df.iterrows():
-                try:
-                    # Validate
-                    if not all([row['username'], row['email'], row.get('role', 'user')]):
-                        logger.warning(f"Skipping invalid row: {row}")
-                        skipped += 1
-                        continue
-                    
-                    # Check if user exists
-                    existing = db.execute(
-                        "SELECT id FROM users WHERE username = ?",
-                        [row['username']]
-                    ).fetchall()
-                    
-                    if existing:
-                        logger.warning(f"User {row['username']} already exists, skipping")
-                        skipped += 1
-                        continue
-                    
-                    # Hash password
-                    pwd = row.get('initial_password', 'DefaultPass123!')
-                    pwd_hash = hashlib.sha256(pwd.encode()).hexdigest()
-                    
-                    # Insert user
-                    db.execute("""
-                        INSERT INTO users (username, email, password_hash, role)
-                        VALUES (?, ?, ?, ?)
-                    """, [
-                        row['username'],
-                        row['email'],
-                        pwd_hash,
-                        row.get('role', 'user')
-                    ])
-                    
-                    count += 1
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to import user {row.get('username')}: {e}")
-                    skipped += 1
-                    continue
+            for col in ['username', 'email', 'role']:
+                df[col] = df[col].str.strip()
+            df['role'] = df['role'].fillna('user').str.lower()
+            df['initial_password'] = df['initial_password'].fillna('DefaultPass123!')
             
-            db.commit()
-            db.close()
+            # Validate
+            valid = (
+                df['username'].fillna('').ne('')
+                & df['email'].fillna('').str.contains('@', regex=False)
+                & df['role'].isin(['admin', 'manager', 'user'])
+            )
+            invalid = int((~valid).sum())
+            if invalid:
+                logger.warning(f"Skipping {invalid} invalid rows")
+            df = df[valid]
             
-            logger.info(f"✅ Imported {count} users ({skipped} skipped)")
-            return count, skipped
+            # Drop repeats within the file, then users that already exist
+            df = df.drop_duplicates('username').drop_duplicates('email')
             
+            db = self.get_db()
+            try:
+                new = new_users(db, df[['username', 'email', 'role', 'initial_password']])
+                duplicates = total - invalid - len(new)
+                
+                workers = workers or os.cpu_count()
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    chunksize = max(1, len(new) // (workers * 4))
+                    new['password_hash'] = list(pool.map(hash_password, new['initial_password'], chunksize=chunksize))
+                
+                db.execute("BEGIN TRANSACTION")
+                try:
+                    created = bulk_insert_users(db, new[['username', 'email', 'password_hash', 'role']])
+                    db.execute("COMMIT")
+                except Exception:
+                    db.execute("ROLLBACK")
+                    raise
+            finally:
+                db.close()
+            
+            result = {'created': created, 'duplicates': duplicates, 'invalid': invalid}
+            logger.info(
+                f"✅ Imported {created} users ({duplicates} duplicates, {invalid} invalid) "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
+            return result
+        
         except Exception as e:
             logger.error(f"❌ User import failed: {e}")
             raise
@@ -270,12 +342,12 @@ class ProductionDataSync:
             
             # Get counts
             users = db.execute("SELECT COUNT(*) FROM users").fetchall()[0][0]
-            sales = db.execute("SELECT COUNT(*) FROM sales").fetchall()[0][0]
+            sales = db.execute("SELECT COUNT(*) FROM sales_all").fetchall()[0][0]
             products = db.execute("SELECT COUNT(*) FROM products").fetchall()[0][0]
             
             # Check for recent data
             last_sale = db.execute(
-                "SELECT MAX(date) FROM sales"
+                "SELECT MAX(date) FROM sales_all"
             ).fetchall()[0][0]
             
             db.close()
@@ -300,68 +372,160 @@ class ProductionDataSync:
             
             logger.info(f"✅ Health check: {json.dumps(health_report, indent=2)}")
             return health_report
-            
+        
         except Exception as e:
             logger.error(f"❌ Health check failed: {e}")
             return {'status': 'error', 'error': str(e)}
     
     # ============= BACKUP & MAINTENANCE =============
     
-    def backup_database(self, backup_dir='backups'):
-        """Create database backup"""
+    def backup_database(self, backup_dir=BACKUP_DIR):
+        """
+        Snapshot the database as zstd Parquet partitions to the backup
+        directory (and S3 when AWS_S3_BACKUP_BUCKET is set), shipping only
+        partitions that changed since the previous backup
+        """
         try:
-            Path(backup_dir).mkdir(exist_ok=True)
-            
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_path = Path(backup_dir) / f'dashboard_backup_{timestamp}.duckdb'
-            
-            import shutil
-            shutil.copy(self.db_path, backup_path)
-            
-            logger.info(f"✅ Database backed up to: {backup_path}")
-            
-            # Optional: Upload to S3
-            if os.getenv('AWS_S3_BACKUP_BUCKET'):
-                self._upload_to_s3(backup_path)
-            
-            return str(backup_path)
-            
+            stores = backup_stores(backup_dir)
+            db = self.get_db()
+            try:
+                result = backup_database(db, stores)
+            finally:
+                db.close()
+            
+            logger.info(
+                f"✅ Backup {result['manifest']} to {', '.join(map(str, stores))}: {result['rows']} rows, "
+                f"{result['uploaded_objects']}/{result['objects']} objects shipped "
+                f"({result['uploaded_bytes'] / 1024 / 1024:.1f} MB) in {result['seconds']:.1f}s"
+            )
+            return result
+        
         except Exception as e:
             logger.error(f"❌ Backup failed: {e}")
             raise
     
-    def _upload_to_s3(self, file_path):
-        """Upload backup to AWS S3"""
+    def restore_backup(self, target_path, manifest=None, backup_dir=BACKUP_DIR, from_s3=False, cold_dir=None):
+        """Rebuild a backup into a new database file at target_path, its cold tier into a new cold_dir"""
         try:
-            import boto3
-            
-            s3 = boto3.client('s3')
-            bucket = os.getenv('AWS_S3_BACKUP_BUCKET')
-            key = f"backups/{Path(file_path).name}"
-            
-            s3.upload_file(file_path, bucket, key)
-            logger.info(f"✅ Backup uploaded to S3: s3://{bucket}/{key}")
-            
+            store = S3BackupStore() if from_s3 else LocalBackupStore(backup_dir)
+            result = restore_database(store, target_path, manifest, cold_dir)
+            
+            logger.info(
+                f"✅ Restored {result['manifest']} from {store} to {target_path} (cold tier in {result['cold_dir']}): "
+                f"{result['rows']} rows, "
+                f"download {result['download_seconds']:.1f}s ({result['downloaded_bytes'] / 1024 / 1024:.1f} MB), "
+                f"load {result['load_seconds']:.1f}s, total {result['seconds']:.1f}s"
+            )
+            return result
+        
         except Exception as e:
-            logger.warning(f"Could not upload to S3: {e}")
+            logger.error(f"❌ Restore failed: {e}")
+            raise
     
-    def cleanup_old_backups(self, backup_dir='backups', days=30):
-        """Remove backups older than N days"""
+    def cleanup_old_backups(self, backup_dir=BACKUP_DIR, days=BACKUP_RETENTION_DAYS):
+        """Drop backups older than N days and the partition objects only they used"""
         try:
-            cutoff_date = datetime.now() - timedelta(days=days)
             removed = 0
+            for store in backup_stores(backup_dir):
+                result = prune_backups(store, days)
+                removed += result['manifests']
+                logger.info(f"✅ {store}: removed {result['manifests']} backups and {result['objects']} objects")
             
-            for backup_file in Path(backup_dir).glob('dashboard_backup_*.duckdb'):
-                if datetime.fromtimestamp(backup_file.stat().st_mtime) < cutoff_date:
-                    backup_file.unlink()
-                    removed += 1
-            
-            logger.info(f"✅ Cleaned up {removed} old backups")
             return removed
-            
+        
         except Exception as e:
             logger.warning(f"Cleanup failed: {e}")
     
+    def tier_cold_sales(self):
+        """Move closed months of sales to the Parquet cold tier"""
+        try:
+            db = self.get_db()
+            try:
+                result = tier_closed_months(db)
+            finally:
+                db.close()
+            
+            logger.info(
+                f"✅ Tiered {result['rows']} sales rows into {len(result['partitions'])} "
+                f"partitions in {result['seconds']:.1f}s"
+            )
+            return result
+        
+        except Exception as e:
+            logger.error(f"❌ Cold tiering failed: {e}")
+            raise
+    
+    def audit_retention(self):
+        """Drop audit log partitions past the retention window"""
+        try:
+            db = self.get_db()
+            try:
+                result = apply_audit_retention(db)
+            finally:
+                db.close()
+            
+            logger.info(
+                f"✅ Audit retention: dropped {len(result['dropped'])} partitions, "
+                f"reclaimed {result['bytes_reclaimed'] / 1024 / 1024:.1f} MB in {result['seconds']:.1f}s"
+            )
+            return result
+        
+        except Exception as e:
+            logger.error(f"❌ Audit retention failed: {e}")
+            raise
+    
+    def _log_size_change(self, label, result):
+        before, after = result['before'], result['after']
+        logger.info(
+            f"✅ {label}: file {before['db_bytes'] / 1024 / 1024:.1f} MB -> {after['db_bytes'] / 1024 / 1024:.1f} MB, "
+            f"WAL {before['wal_bytes'] / 1024 / 1024:.1f} MB -> {after['wal_bytes'] / 1024 / 1024:.1f} MB "
+            f"in {result['seconds']:.1f}s"
+        )
+    
+    def checkpoint_database(self):
+        """Force a checkpoint, folding the WAL into the database file"""
+        try:
+            db = self.get_db()
+            try:
+                # Run while the dashboard is stopped, so FORCE has no one else's transactions to abort
+                result = checkpoint(db, self.db_path, force=True)
+            finally:
+                db.close()
+            
+            self._log_size_change("Checkpoint", result)
+            return result
+        
+        except Exception as e:
+            logger.error(f"❌ Checkpoint failed: {e}")
+            raise
+    
+    def compact_database(self):
+        """Rewrite the database into a fresh file; the dashboard must not be running"""
+        try:
+            result = compact_database(self.db_path)
+            self._log_size_change("Compaction", result)
+            return result
+        
+        except Exception as e:
+            logger.error(f"❌ Compaction failed: {e}")
+            raise
+    
+    def storage_report(self):
+        """Log per-table rows, row groups and size"""
+        try:
+            db = self.get_db()
+            try:
+                stats = storage_stats(db)
+            finally:
+                db.close()
+            
+            logger.info(f"✅ Storage statistics:\n{stats.to_string(index=False)}")
+            return stats
+        
+        except Exception as e:
+            logger.error(f"❌ Storage report failed: {e}")
+            raise
+    
     # ============= SCHEDULER SETUP =============
     
     def start_scheduler(self):
@@ -409,9 +573,30 @@ class ProductionDataSync:
                 name='Cleanup Old Backups'
             )
             
+            # Move last month's sales to the cold tier on the 1st
+            self.scheduler.add_job(
+                self.tier_cold_sales,
+                'cron',
+                day=1,
+                hour=4,
+                minute=30,
+                id='tier_cold_sales',
+                name='Tier Closed Months of Sales'
+            )
+            
+            # Audit log retention daily at 4:45 AM
+            self.scheduler.add_job(
+                self.audit_retention,
+                'cron',
+                hour=4,
+                minute=45,
+                id='audit_retention',
+                name='Audit Log Retention'
+            )
+            
             self.scheduler.start()
             logger.info("✅ Scheduler started")
-            
+        
         except Exception as e:
             logger.error(f"❌ Scheduler start failed: {e}")
             raise
@@ -441,16 +626,46 @@ if __name__ == '__main__':
     sales_parser.add_argument('--api', help='API URL', default=None)
     sales_parser.add_argument('--days', type=int, default=1, help='Days back to sync')
     sales_parser.add_argument('--csv', help='CSV file path', default=None)
+    sales_parser.add_argument('--restart', action='store_true', help='Ignore progress saved by an interrupted --csv import')
     
     # User import
     user_parser = subparsers.add_parser('import-users', help='Import users from CSV')
     user_parser.add_argument('file', help='CSV file path')
+    user_parser.add_argument('--workers', type=int, default=None, help='Password hashing processes (default: all cores)')
+    
+    # Large file import
+    file_parser = subparsers.add_parser('import-file', help='Stream a large CSV/Parquet sales file, resuming after failures')
+    file_parser.add_argument('file', help='CSV or Parquet file path (or glob with --native)')
+    file_parser.add_argument('--chunk-rows', type=int, default=IMPORT_CHUNK_ROWS, help='Rows per chunk')
+    file_parser.add_argument('--restart', action='store_true', help='Ignore saved progress')
+    file_parser.add_argument('--native', action='store_true',
+                             help='Scan with DuckDB directly (also CSV/Parquet/JSON globs); fast but not resumable')
     
     # Health check
     subparsers.add_parser('health-check', help='Run health check')
     
     # Backup
-    subparsers.add_parser('backup', help='Create backup')
+    subparsers.add_parser('backup', help='Create an incremental Parquet backup')
+    
+    restore_parser = subparsers.add_parser('restore', help='Restore a backup into a new database file')
+    restore_parser.add_argument('target', help='Path of the database file to create')
+    restore_parser.add_argument('--manifest', default=None, help='Backup to restore (default: latest)')
+    restore_parser.add_argument('--s3', action='store_true', help='Restore from S3 instead of the local backup directory')
+    restore_parser.add_argument('--cold-dir', default=None,
+                                help='New directory for the cold-tier Parquet (default: <target>_cold beside the file)')
+    
+    subparsers.add_parser('list-backups', help='List available backups')
+    
+    # Cold tier
+    subparsers.add_parser('tier-sales', help='Move closed months of sales to Parquet')
+    
+    # Audit retention
+    subparsers.add_parser('audit-retention', help='Drop expired audit log partitions')
+    
+    # Storage maintenance
+    subparsers.add_parser('checkpoint', help='Force a checkpoint and report WAL/file sizes')
+    subparsers.add_parser('compact', help='Rewrite the database into a fresh file (stop the dashboard first)')
+    subparsers.add_parser('storage-stats', help='Per-table storage statistics')
     
     # Scheduler
     subparsers.add_parser('start-scheduler', help='Start background scheduler')
@@ -460,12 +675,18 @@ if __name__ == '__main__':
     try:
         if args.command == 'sync-sales':
             if args.csv:
-                sync.sync_sales_from_csv(args.csv)
+                sync.sync_sales_from_csv(args.csv, args.restart)
             else:
                 sync.sync_sales_from_api(args.api, args.days)
         
         elif args.command == 'import-users':
-            sync.sync_users_from_csv(args.file)
+            sync.sync_users_from_csv(args.file, args.workers)
+        
+        elif args.command == 'import-file':
+            if args.native:
+                sync.import_sales_native(args.file)
+            else:
+                sync.import_sales_file(args.file, args.chunk_rows, args.restart)
         
         elif args.command == 'health-check':
             sync.health_check()
@@ -473,12 +694,33 @@ if __name__ == '__main__':
         elif args.command == 'backup':
             sync.backup_database()
         
+        elif args.command == 'restore':
+            sync.restore_backup(args.target, args.manifest, from_s3=args.s3, cold_dir=args.cold_dir)
+        
+        elif args.command == 'list-backups':
+            for store in backup_stores():
+                print(f"{store}: {', '.join(list_backups(store)) or 'none'}")
+        
+        elif args.command == 'tier-sales':
+            sync.tier_cold_sales()
+        
+        elif args.command == 'audit-retention':
+            sync.audit_retention()
+        
+        elif args.command == 'checkpoint':
+            sync.checkpoint_database()
+        
+        elif args.command == 'compact':
+            sync.compact_database()
+        
+        elif args.command == 'storage-stats':
+            sync.storage_report()
+        
         elif args.command == 'start-scheduler':
             sync.start_scheduler()
             import atexit
             atexit.register(sync.stop_scheduler)
             print("Scheduler running... Press Ctrl+C to stop")
-            import time
             while True:
                 time.sleep(1)
         
@@ -0,0 +1,246 @@
+"""
+HTTP Client
+Shared HTTP layer for connectors: keep-alive pooling, bounded timeouts, retries
+with jittered backoff, cached OAuth tokens, ETag revalidation and latency metrics
+"""
+
+import copy
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src import metrics
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT_SECONDS = float(os.getenv('HTTP_CONNECT_TIMEOUT_SECONDS', '5'))
+READ_TIMEOUT_SECONDS = float(os.getenv('HTTP_READ_TIMEOUT_SECONDS', '30'))
+MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '5'))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Spaces calls out to at most rate per second, shared across threads"""
+    
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+    
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        
+        if start > now:
+            time.sleep(start - now)
+
+
+class OAuthToken:
+    """
+    Caches a bearer token and fetches a new one shortly before it expires,
+    so requests never go out with a token about to lapse mid-sync.
+    """
+    
+    def __init__(self, fetch, refresh_margin=60, default_ttl=3600):
+        """
+        Args:
+            fetch: Callable returning the token endpoint's JSON (access_token, optional expires_in)
+            refresh_margin: Seconds before expiry at which the token is renewed
+            default_ttl: Lifetime assumed when the response carries no expires_in
+        """
+        self.fetch = fetch
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self.payload = {}
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+    
+    def get(self):
+        with self._lock:
+            if self._token is None or time.monotonic() >= self._expires_at - self.refresh_margin:
+                self.payload = self.fetch()
+                self._token = self.payload['access_token']
+                self._expires_at = time.monotonic() + float(self.payload.get('expires_in', self.default_ttl))
+                metrics.increment('http.token_refreshed')
+            return self._token
+    
+    def invalidate(self):
+        """Drop the cached token, e.g. after the server rejected it with 401"""
+        with self._lock:
+            self._token = None
+
+
+class HTTPClient:
+    """
+    Requests session shared by every call a connector makes.
+    
+    Idempotent requests are retried on connection errors, timeouts and
+    429/5xx responses with full-jitter exponential backoff, waiting at least
+    as long as any Retry-After header asks. GETs made with revalidate=True
+    remember responses carrying an ETag and revalidate them with
+    If-None-Match; a 304 returns a copy of the cached response with
+    not_modified set, so callers can skip reprocessing it. Caching is opt-in
+    because it keeps whole bodies in memory, which paginated syncs never
+    re-request anyway. Every attempt is timed under http.<name>.* metrics.
+    """
+    
+    def __init__(self, name, base_url=None, headers=None, token=None, rate_limiter=None,
+                 timeout=None, max_retries=None, backoff_base=0.5, backoff_max=30.0,
+                 pool_maxsize=16, etag_cache_size=16):
+        self.name = name
+        self.base_url = base_url
+        self.token = token
+        self.rate_limiter = rate_limiter
+        self.timeout = timeout or (CONNECT_TIMEOUT_SECONDS, READ_TIMEOUT_SECONDS)
+        self.max_retries = MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.etag_cache_size = etag_cache_size
+        self._etags = OrderedDict()
+        self._etags_lock = threading.Lock()
+        
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def _url(self, url):
+        if self.base_url and not url.startswith(('http://', 'https://')):
+            return urljoin(self.base_url.rstrip('/') + '/', url.lstrip('/'))
+        return url
+    
+    def _backoff(self, attempt, response=None):
+        # backoff_max caps our own jittered backoff only; an explicit Retry-After is always honoured
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                try:
+                    delay = max(delay, (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds())
+                except (TypeError, ValueError):
+                    # Malformed (or zone-less) HTTP date: fall back to the jittered backoff
+                    pass
+        return max(delay, 0.0)
+    
+    def request(self, method, url, params=None, headers=None, retry=None, revalidate=False, **kwargs):
+        """
+        Send a request and return the final response, raising for error statuses.
+        
+        Args:
+            retry: Retry failed attempts; defaults to True except for POST/PATCH
+            revalidate: Cache this GET's response by ETag (at most etag_cache_size of them)
+                        and revalidate it on the next identical call
+            **kwargs: Passed to requests (data, json, ...)
+        """
+        url = self._url(url)
+        retry = method.upper() not in ('POST', 'PATCH') if retry is None else retry
+        cache_key = (url, repr(sorted((params or {}).items()))) if revalidate and method.upper() == 'GET' else None
+        refreshed_token = False
+        attempt = 0
+        
+        while True:
+            request_headers = dict(headers or {})
+            if self.token:
+                request_headers['Authorization'] = f"Bearer {self.token.get()}"
+            
+            cached = None
+            if cache_key:
+                with self._etags_lock:
+                    cached = self._etags.get(cache_key)
+                if cached:
+                    request_headers['If-None-Match'] = cached.headers['ETag']
+            
+            if self.rate_limiter:
+                self.rate_limiter.wait()
+            
+            start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method, url, params=params, headers=request_headers, timeout=self.timeout, **kwargs
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                metrics.observe(f"http.{self.name}.latency", time.perf_counter() - start)
+                metrics.increment(f"http.{self.name}.errors")
+                if not retry or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f"{self.name}: {type(e).__name__}, retrying in {delay:.1f}s")
+                metrics.increment(f"http.{self.name}.retries")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            
+            metrics.observe(f"http.{self.name}.latency", time.perf_counter() - start)
+            metrics.increment(f"http.{self.name}.requests")
+            
+            if response.status_code == 304 and cached:
+                metrics.increment(f"http.{self.name}.not_modified")
+                response = copy.copy(cached)
+                response.not_modified = True
+                return response
+            
+            if response.status_code == 401 and self.token and not refreshed_token:
+                # The cached token was revoked or expired early; fetch a new one once
+                self.token.invalidate()
+                refreshed_token = True
+                continue
+            
+            # Rate-limited requests were not processed, so they are safe to resend whatever the method
+            if response.status_code in RETRY_STATUSES and (retry or response.status_code == 429) \
+                    and attempt < self.max_retries:
+                delay = self._backoff(attempt, response)
+                metrics.increment(f"http.{self.name}.retries")
+                logger.warning(f"{self.name}: HTTP {response.status_code}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            
+            if response.status_code >= 400:
+                metrics.increment(f"http.{self.name}.errors")
+            response.raise_for_status()
+            response.not_modified = False
+            
+            if cache_key and response.headers.get('ETag'):
+                with self._etags_lock:
+                    self._etags[cache_key] = response
+                    self._etags.move_to_end(cache_key)
+                    while len(self._etags) > self.etag_cache_size:
+                        self._etags.popitem(last=False)
+            
+            return response
+    
+    def get(self, url, params=None, **kwargs):
+        return self.request('GET', url, params=params, **kwargs)
+    
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+    
+    def stats(self):
+        """Request, retry and error counts plus latency for this client"""
+        snapshot = metrics.snapshot()
+        prefix = f"http.{self.name}."
+        latency = snapshot['timings'].get(f"{prefix}latency", {})
+        return {
+            **{name[len(prefix):]: value for name, value in snapshot['counters'].items() if name.startswith(prefix)},
+            'avg_latency_ms': latency.get('avg', 0.0) * 1000,
+            'max_latency_ms': latency.get('max', 0.0) * 1000
+        }
+    
+    def close(self):
+        self.session.close()
@@ -0,0 +1,552 @@
+"""
+Mock Upstream APIs
+Local stand-ins for connector APIs, used for throughput tests without real credentials
+"""
+
+import base64
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlencode, urlparse
+from xml.sax.saxutils import escape as xml_escape, unescape as xml_unescape
+
+
+class MockAPI:
+    """Latency and a requests-per-second limit shared by the mock APIs"""
+    
+    def __init__(self, latency=0.0, max_requests_per_second=None):
+        self.latency = latency
+        self.interval = 1.0 / max_requests_per_second if max_requests_per_second else 0.0
+        self._lock = threading.Lock()
+        self._last_request = 0.0
+        self.requests = 0
+        self.throttled = 0
+    
+    def _throttle(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            if self.interval and now - self._last_request < self.interval:
+                self.throttled += 1
+                return True
+            self._last_request = now
+            return False
+    
+    def _admit(self):
+        """None if the request may proceed (after the simulated latency), else a 429 response"""
+        if self._throttle():
+            return 429, {'Retry-After': f"{self.interval:.3f}"}, {'errors': 'Exceeded call limit'}
+        
+        if self.latency:
+            time.sleep(self.latency)
+        return None
+
+
+def _encode_cursor(cursor: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode()
+
+
+def _decode_cursor(token: str) -> dict:
+    return json.loads(base64.urlsafe_b64decode(token))
+
+
+# ============= SHOPIFY =============
+
+class MockShopify(MockAPI):
+    """
+    Deterministic order history: order i is created at start + i * spacing and
+    has 1-3 line items. Pages follow Shopify's REST cursor scheme, a Link header
+    with rel="next" whose page_info is opaque to the client.
+    """
+    
+    PRODUCTS = [("Laptop", 999.99), ("Monitor", 299.99), ("Keyboard", 79.99), ("Mouse", 29.99)]
+    COUNTRIES = ["US", "DE", "JP", "BR"]
+    
+    def __init__(self, orders=10_000, days=7, latency=0.0, max_requests_per_second=None):
+        super().__init__(latency, max_requests_per_second)
+        self.orders = orders
+        self.end = datetime.now().replace(microsecond=0)
+        self.start = self.end - timedelta(days=days)
+        self.spacing = (self.end - self.start) / orders
+    
+    def _index_at(self, moment: datetime) -> int:
+        """Index of the first order created at or after moment"""
+        offset = (moment - self.start) / self.spacing
+        return min(max(int(offset) + (offset % 1 > 0), 0), self.orders)
+    
+    def order(self, i: int) -> dict:
+        created_at = self.start + self.spacing * i
+        items = []
+        for item in range(1 + i % 3):
+            name, price = self.PRODUCTS[(i + item) % len(self.PRODUCTS)]
+            items.append({'id': i * 10 + item, 'name': name, 'quantity': 1 + (i + item) % 4, 'price': f"{price:.2f}"})
+        
+        return {
+            'id': i + 1,
+            'created_at': created_at.replace(microsecond=0).isoformat(),
+            'customer': {'id': 1 + i % 3},
+            'shipping_address': {'country': self.COUNTRIES[i % len(self.COUNTRIES)]},
+            'line_items': items
+        }
+    
+    def orders_page(self, query: dict):
+        """Returns (status, headers, body) for GET /admin/api/<version>/orders.json"""
+        rejected = self._admit()
+        if rejected:
+            return rejected
+        
+        limit = min(int(query.get('limit', 50)), 250)
+        
+        if 'page_info' in query:
+            cursor = _decode_cursor(query['page_info'])
+            low, high = cursor['next'], cursor['high']
+        else:
+            low = self._index_at(datetime.fromisoformat(query['created_at_min'])) if 'created_at_min' in query else 0
+            high = self.orders
+            if 'created_at_max' in query:
+                high = self._index_at(datetime.fromisoformat(query['created_at_max']) + timedelta(seconds=1))
+        
+        page_end = min(low + limit, high)
+        headers = {}
+        if page_end < high:
+            page_info = _encode_cursor({'next': page_end, 'high': high})
+            headers['Link'] = f'<{{base}}?{urlencode({"limit": limit, "page_info": page_info})}>; rel="next"'
+        
+        return 200, headers, {'orders': [self.order(i) for i in range(low, page_end)]}
+
+
+# ============= SALESFORCE & HUBSPOT =============
+
+class _ModifiedHistory(MockAPI):
+    """Records whose last-modified times are spread evenly over the past `days` days, in UTC"""
+    
+    STAGES = ["Prospecting", "Qualification", "Negotiation", "Closed Won"]
+    
+    def __init__(self, records, days, latency, max_requests_per_second):
+        super().__init__(latency, max_requests_per_second)
+        self.records = records
+        self.end = datetime.now(timezone.utc).replace(microsecond=0)
+        self.start = self.end - timedelta(days=days)
+        self.spacing = (self.end - self.start) / records
+    
+    def _index_at(self, moment: datetime) -> int:
+        """Index of the first record modified at or after moment"""
+        offset = (moment - self.start) / self.spacing
+        return min(max(int(offset) + (offset % 1 > 0), 0), self.records)
+    
+    def modified_at(self, i: int) -> datetime:
+        return self.start + self.spacing * i
+
+
+class MockSalesforce(_ModifiedHistory):
+    """
+    Opportunities behind a client-credentials token endpoint and the SOQL
+    query resource. Only LastModifiedDate >= / < bounds in the WHERE clause
+    are honoured; results come page_size at a time with nextRecordsUrl.
+    """
+    
+    def __init__(self, records=20_000, days=7, latency=0.0, max_requests_per_second=None, page_size=2000):
+        super().__init__(records, days, latency, max_requests_per_second)
+        self.page_size = page_size
+    
+    def opportunity(self, i: int) -> dict:
+        opportunity_id = f"006{i:015d}"
+        return {
+            'attributes': {'type': 'Opportunity', 'url': f"/services/data/v59.0/sobjects/Opportunity/{opportunity_id}"},
+            'Id': opportunity_id,
+            'Name': f"Opportunity {i + 1}",
+            'Amount': float(1000 + i % 50 * 250),
+            'StageName': self.STAGES[i % len(self.STAGES)],
+            'CloseDate': (self.modified_at(i) + timedelta(days=30)).date().isoformat(),
+            'AccountId': f"001{i % 500:015d}",
+            'LastModifiedDate': self.modified_at(i).strftime('%Y-%m-%dT%H:%M:%S.000+0000')
+        }
+    
+    def token(self):
+        """Returns (status, headers, body) for POST /services/oauth2/token"""
+        return 200, {}, {'access_token': 'mock-salesforce-token', 'token_type': 'Bearer'}
+    
+    def _page(self, path: str, low: int, high: int):
+        page_end = min(low + self.page_size, high)
+        body = {'totalSize': high - low, 'done': page_end >= high,
+                'records': [self.opportunity(i) for i in range(low, page_end)]}
+        if page_end < high:
+            body['nextRecordsUrl'] = f"{path.rstrip('/')}/{_encode_cursor({'next': page_end, 'high': high})}"
+        return 200, {}, body
+    
+    def query(self, path: str, query: dict):
+        """Returns (status, headers, body) for GET /services/data/<version>/query?q=..."""
+        rejected = self._admit()
+        if rejected:
+            return rejected
+        
+        low, high = 0, self.records
+        parse = lambda value: datetime.strptime(value, '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+        for operator, value in re.findall(r"LastModifiedDate\s*(>=|<)\s*(\S+Z)", query.get('q', '')):
+            if operator == '>=':
+                low = max(low, self._index_at(parse(value)))
+            else:
+                high = min(high, self._index_at(parse(value)))
+        
+        return self._page(path, low, max(low, high))
+    
+    def query_more(self, path: str, locator: str):
+        """Returns (status, headers, body) for GET /services/data/<version>/query/<locator>"""
+        rejected = self._admit()
+        if rejected:
+            return rejected
+        
+        cursor = _decode_cursor(locator)
+        return self._page(path.rsplit('/', 1)[0], cursor['next'], cursor['high'])
+
+
+class MockHubSpot(_ModifiedHistory):
+    """
+    Deals behind the CRM v3 list and search endpoints, paged with
+    paging.next.after. Search honours hs_lastmodifieddate GTE/LT filters and,
+    like HubSpot, refuses to page past its first 10,000 results.
+    """
+    
+    SEARCH_LIMIT = 10_000
+    
+    def __init__(self, deals=20_000, days=7, latency=0.0, max_requests_per_second=None):
+        super().__init__(deals, days, latency, max_requests_per_second)
+    
+    def deal(self, i: int) -> dict:
+        modified = self.modified_at(i).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+        return {
+            'id': str(i + 1),
+            'properties': {
+                'dealname': f"Deal {i + 1}",
+                'dealstage': self.STAGES[i % len(self.STAGES)].lower().replace(' ', ''),
+                'amount': str(500 + i % 40 * 125),
+                'closedate': (self.modified_at(i) + timedelta(days=14)).strftime('%Y-%m-%dT%H:%M:%S.000Z'),
+                'hs_lastmodifieddate': modified
+            },
+            'createdAt': modified,
+            'updatedAt': modified,
+            'archived': False
+        }
+    
+    def _page(self, low: int, high: int, after: int, limit: int) -> dict:
+        page_end = min(low + after + limit, high)
+        body = {'results': [self.deal(i) for i in range(low + after, page_end)]}
+        if page_end < high:
+            body['paging'] = {'next': {'after': str(page_end - low)}}
+        return body
+    
+    def deals_page(self, query: dict):
+        """Returns (status, headers, body) for GET /crm/v3/objects/deals"""
+        rejected = self._admit()
+        if rejected:
+            return rejected
+        
+        return 200, {}, self._page(0, self.records, int(query.get('after', 0)), min(int(query.get('limit', 10)), 100))
+    
+    def search(self, body: dict):
+        """Returns (status, headers, body) for POST /crm/v3/objects/deals/search"""
+        rejected = self._admit()
+        if rejected:
+            return rejected
+        
+        low, high = 0, self.records
+        for group in body.get('filterGroups', []):
+            for condition in group.get('filters', []):
+                if condition.get('propertyName') != 'hs_lastmodifieddate':
+                    continue
+                moment = datetime.fromtimestamp(int(condition['value']) / 1000, timezone.utc)
+                if condition['operator'] == 'GTE':
+                    low = max(low, self._index_at(moment))
+                elif condition['operator'] == 'LT':
+                    high = min(high, self._index_at(moment))
+        
+        after, limit = int(body.get('after', 0)), min(int(body.get('limit', 10)), 200)
+        if after + limit > self.SEARCH_LIMIT:
+            return 400, {}, {'status': 'error', 'message': 'Search results are limited to 10,000 records'}
+        
+        return 200, {}, self._page(low, max(low, high), after, limit)
+
+
+# ============= S3 =============
+
+class MockS3:
+    """
+    In-memory object store speaking the subset of the S3 REST API that boto3
+    uses for backups: buckets, PUT/GET (with Range)/HEAD/DELETE of objects,
+    ListObjectsV2 and multipart uploads. Requests are not authenticated.
+    """
+    
+    def __init__(self):
+        self.buckets = {}
+        self.uploads = {}
+        self._lock = threading.Lock()
+        self.bytes_in = 0
+        self.bytes_out = 0
+    
+    @staticmethod
+    def _xml(root: str, body: str) -> bytes:
+        return (f'<?xml version="1.0" encoding="UTF-8"?>'
+                f'<{root} xmlns="http://s3.amazonaws.com/doc/2006-03-01/">{body}</{root}>').encode()
+    
+    @staticmethod
+    def _etag(data: bytes) -> str:
+        return f'"{hashlib.md5(data).hexdigest()}"'
+    
+    def _missing(self, code='NoSuchKey'):
+        return 404, {'Content-Type': 'application/xml'}, self._xml('Error', f'<Code>{code}</Code>')
+    
+    def handle(self, method: str, path: str, query: dict, body: bytes):
+        """Returns (status, headers, body bytes) for one request; path is /bucket[/key]"""
+        bucket, _, key = unquote(path).lstrip('/').partition('/')
+        
+        with self._lock:
+            if not key:
+                if method == 'PUT':
+                    self.buckets.setdefault(bucket, {})
+                    return 200, {}, b''
+                if bucket not in self.buckets:
+                    return self._missing('NoSuchBucket')
+                if method == 'HEAD':
+                    return 200, {}, b''
+                if method == 'GET':
+                    return self._list(bucket, query)
+                if method == 'POST' and 'delete' in query:
+                    keys = re.findall(r'<Key>(.*?)</Key>', body.decode())
+                    for name in keys:
+                        self.buckets[bucket].pop(xml_unescape(name), None)
+                    deleted = ''.join(f'<Deleted><Key>{name}</Key></Deleted>' for name in keys)
+                    return 200, {'Content-Type': 'application/xml'}, self._xml('DeleteResult', deleted)
+                return 405, {}, b''
+            
+            if bucket not in self.buckets:
+                return self._missing('NoSuchBucket')
+            objects = self.buckets[bucket]
+            
+            if method == 'POST' and 'uploads' in query:
+                upload_id = uuid.uuid4().hex
+                self.uploads[upload_id] = {}
+                return 200, {'Content-Type': 'application/xml'}, self._xml('InitiateMultipartUploadResult', (
+                    f'<Bucket>{bucket}</Bucket><Key>{xml_escape(key)}</Key><UploadId>{upload_id}</UploadId>'
+                ))
+            
+            if method == 'PUT' and 'uploadId' in query:
+                self.uploads[query['uploadId']][int(query['partNumber'])] = body
+                self.bytes_in += len(body)
+                return 200, {'ETag': self._etag(body)}, b''
+            
+            if method == 'POST' and 'uploadId' in query:
+                parts = self.uploads.pop(query['uploadId'])
+                objects[key] = (b''.join(parts[number] for number in sorted(parts)), time.time())
+                return 200, {'Content-Type': 'application/xml'}, self._xml('CompleteMultipartUploadResult', (
+                    f'<Bucket>{bucket}</Bucket><Key>{xml_escape(key)}</Key><ETag>{self._etag(objects[key][0])}</ETag>'
+                ))
+            
+            if method == 'PUT':
+                objects[key] = (body, time.time())
+                self.bytes_in += len(body)
+                return 200, {'ETag': self._etag(body)}, b''
+            
+            if method == 'DELETE':
+                objects.pop(key, None)
+                return 204, {}, b''
+            
+            if key not in objects:
+                return self._missing()
+            data, modified = objects[key]
+            headers = {'ETag': self._etag(data), 'Content-Type': 'binary/octet-stream',
+                       'Last-Modified': formatdate(modified, usegmt=True), 'Accept-Ranges': 'bytes'}
+            
+            if method == 'HEAD':
+                return 200, {**headers, 'Content-Length': str(len(data))}, b''
+            
+            status, content = 200, data
+            match = re.fullmatch(r'bytes=(\d+)-(\d*)', query.get('Range', ''))
+            if match:
+                first = int(match.group(1))
+                last = min(int(match.group(2) or len(data) - 1), len(data) - 1)
+                status, content = 206, data[first:last + 1]
+                headers['Content-Range'] = f"bytes {first}-{last}/{len(data)}"
+            self.bytes_out += len(content)
+            return status, headers, content
+    
+    def _list(self, bucket: str, query: dict):
+        prefix = query.get('prefix', '')
+        limit = int(query.get('max-keys', 1000))
+        names = sorted(name for name in self.buckets[bucket] if name.startswith(prefix))
+        start = query.get('continuation-token') or query.get('start-after', '')
+        names = [name for name in names if name > start]
+        page, truncated = names[:limit], len(names) > limit
+        
+        contents = ''.join(
+            f'<Contents><Key>{xml_escape(name)}</Key><Size>{len(self.buckets[bucket][name][0])}</Size>'
+            f'<ETag>{self._etag(self.buckets[bucket][name][0])}</ETag>'
+            f'<LastModified>{datetime.fromtimestamp(self.buckets[bucket][name][1], timezone.utc):%Y-%m-%dT%H:%M:%S.000Z}'
+            f'</LastModified><StorageClass>STANDARD</StorageClass></Contents>'
+            for name in page
+        )
+        body = (f'<Name>{bucket}</Name><Prefix>{xml_escape(prefix)}</Prefix><KeyCount>{len(page)}</KeyCount>'
+                f'<MaxKeys>{limit}</MaxKeys><IsTruncated>{str(truncated).lower()}</IsTruncated>{contents}')
+        if truncated:
+            body += f'<NextContinuationToken>{xml_escape(page[-1])}</NextContinuationToken>'
+        return 200, {'Content-Type': 'application/xml'}, self._xml('ListBucketResult', body)
+
+
+def _read_body(handler) -> bytes:
+    """Request body, undoing HTTP chunking and the aws-chunked encoding boto3 uses for streamed checksums"""
+    if handler.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+        raw = b''
+        while True:
+            size = int(handler.rfile.readline().split(b';')[0].strip() or b'0', 16)
+            if not size:
+                while handler.rfile.readline().strip():
+                    pass
+                break
+            raw += handler.rfile.read(size)
+            handler.rfile.readline()
+    else:
+        raw = handler.rfile.read(int(handler.headers.get('Content-Length', 0)))
+    
+    if 'aws-chunked' not in handler.headers.get('Content-Encoding', ''):
+        return raw
+    
+    data, position = b'', 0
+    while True:
+        line_end = raw.index(b'\r\n', position)
+        size = int(raw[position:line_end].split(b';')[0], 16)
+        if not size:
+            return data
+        data += raw[line_end + 2:line_end + 2 + size]
+        position = line_end + 2 + size + 2
+
+
+# ============= SERVER =============
+
+def _handler(shopify: MockShopify, salesforce: MockSalesforce, hubspot: MockHubSpot, s3: MockS3):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        
+        def _respond(self, path, status, headers, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            base = f"http://{self.headers['Host']}{path}"
+            for name, value in headers.items():
+                self.send_header(name, value.replace('{base}', base))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def _s3(self, method):
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+            if 'Range' in self.headers:
+                query['Range'] = self.headers['Range']
+            
+            status, headers, payload = s3.handle(method, url.path[len('/s3'):], query, _read_body(self))
+            self.send_response(status)
+            headers.setdefault('Content-Length', str(len(payload)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            if method != 'HEAD':
+                self.wfile.write(payload)
+        
+        def do_PUT(self):
+            self._s3('PUT')
+        
+        def do_HEAD(self):
+            self._s3('HEAD')
+        
+        def do_DELETE(self):
+            self._s3('DELETE')
+        
+        def do_GET(self):
+            if self.path.startswith('/s3/'):
+                return self._s3('GET')
+            
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            
+            if url.path.endswith('/orders.json'):
+                response = shopify.orders_page(query)
+            elif re.fullmatch(r'/services/data/[^/]+/query/?', url.path):
+                response = salesforce.query(url.path, query)
+            elif re.fullmatch(r'/services/data/[^/]+/query/[^/]+', url.path):
+                response = salesforce.query_more(url.path, url.path.rsplit('/', 1)[1])
+            elif url.path == '/crm/v3/objects/deals':
+                response = hubspot.deals_page(query)
+            else:
+                response = 404, {}, {'errors': 'Not Found'}
+            
+            self._respond(url.path, *response)
+        
+        def do_POST(self):
+            if self.path.startswith('/s3/'):
+                return self._s3('POST')
+            
+            url = urlparse(self.path)
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            
+            if url.path == '/services/oauth2/token':
+                response = salesforce.token()
+            elif url.path == '/crm/v3/objects/deals/search':
+                response = hubspot.search(json.loads(body or b'{}'))
+            else:
+                response = 404, {}, {'errors': 'Not Found'}
+            
+            self._respond(url.path, *response)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    return Handler
+
+
+def start_mock_server(shopify: MockShopify = None, port: int = 0, salesforce: MockSalesforce = None,
+                      hubspot: MockHubSpot = None, s3: MockS3 = None):
+    """
+    Serve the mock APIs on a background thread; returns (server, base_url).
+    The S3 stand-in lives under base_url/s3 (pass that as endpoint_url, path-style).
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), _handler(
+        shopify or MockShopify(), salesforce or MockSalesforce(), hubspot or MockHubSpot(), s3 or MockS3()
+    ))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='mock-api', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Mock upstream APIs for local testing')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--orders', type=int, default=10_000, help='Shopify orders in the mock history')
+    parser.add_argument('--opportunities', type=int, default=20_000, help='Salesforce opportunities in the mock')
+    parser.add_argument('--deals', type=int, default=20_000, help='HubSpot deals in the mock')
+    parser.add_argument('--days', type=int, default=7, help='Days the order and CRM histories span')
+    parser.add_argument('--latency-ms', type=float, default=50, help='Added latency per request')
+    args = parser.parse_args()
+    
+    latency = args.latency_ms / 1000
+    server, base_url = start_mock_server(
+        MockShopify(args.orders, args.days, latency), args.port,
+        MockSalesforce(args.opportunities, args.days, latency), MockHubSpot(args.deals, args.days, latency)
+    )
+    print(f"Mock APIs listening on {base_url} "
+          f"(SHOPIFY_SHOP_URL, SALESFORCE_INSTANCE_URL and HubSpotConnector base_url={base_url}, "
+          f"AWS_S3_ENDPOINT_URL={base_url}/s3)")
+    
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
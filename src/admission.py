@@ -0,0 +1,122 @@
+"""
+Query admission control
+Limits how many heavy queries and exports run at once in this process
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+import streamlit as st
+from src import metrics
+from src.config import (
+    MAX_HEAVY_QUERIES, MAX_QUEUED_QUERIES, QUERY_QUEUE_TIMEOUT_SECONDS, ROLE_MAX_HEAVY_QUERIES
+)
+
+
+class QueryRejected(Exception):
+    """Raised when a heavy query cannot be admitted"""
+
+
+class AdmissionController:
+    """Bounded pool of heavy-query slots with a bounded wait queue"""
+    
+    def __init__(self, max_concurrent: int, max_queued: int, queue_timeout: float, role_limits: dict = None):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._role_slots = {
+            role: threading.BoundedSemaphore(limit)
+            for role, limit in (role_limits or {}).items()
+            if limit < max_concurrent
+        }
+        self._lock = threading.Lock()
+        self.running = 0
+        self.queued = 0
+    
+    def _acquire(self, slots, label: str, on_queued):
+        if slots.acquire(blocking=False):
+            return
+        
+        with self._lock:
+            if self.queued >= self.max_queued:
+                metrics.increment(f"admission.rejected.{label}")
+                raise QueryRejected("Too many queries are waiting, please try again shortly")
+            self.queued += 1
+            position = self.queued
+        
+        metrics.increment(f"admission.queued.{label}")
+        if on_queued:
+            on_queued(position)
+        
+        try:
+            acquired = slots.acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                self.queued -= 1
+        
+        if not acquired:
+            metrics.increment(f"admission.rejected.{label}")
+            raise QueryRejected(f"Query waited more than {self.queue_timeout:.0f}s for a free slot")
+    
+    @contextmanager
+    def admit(self, label: str, role: str = None, on_queued=None):
+        """
+        Hold a heavy-query slot for the duration of the block.
+        
+        Args:
+            label: Name of the workload, used in metrics
+            role: Caller's role, limited to its share of the slots
+            on_queued: Called with the queue position when the caller has to wait
+        
+        Raises:
+            QueryRejected: If the queue is full or the wait times out
+        """
+        start = time.perf_counter()
+        role_slots = self._role_slots.get(role)
+        
+        if role_slots:
+            self._acquire(role_slots, label, on_queued)
+        
+        try:
+            self._acquire(self._slots, label, on_queued)
+        except QueryRejected:
+            if role_slots:
+                role_slots.release()
+            raise
+        
+        metrics.observe("admission.queue_wait", time.perf_counter() - start)
+        metrics.increment(f"admission.admitted.{label}")
+        
+        with self._lock:
+            self.running += 1
+        
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.running -= 1
+            self._slots.release()
+            if role_slots:
+                role_slots.release()
+
+
+admission = AdmissionController(
+    MAX_HEAVY_QUERIES, MAX_QUEUED_QUERIES, QUERY_QUEUE_TIMEOUT_SECONDS, ROLE_MAX_HEAVY_QUERIES
+)
+
+
+@contextmanager
+def admit_heavy(label: str, role: str = None):
+    """Admit a heavy workload, showing a queued notice while it waits"""
+    notice = st.empty()
+    
+    def show_queued(position):
+        notice.info(f"Queued: waiting for a free query slot (position {position})")
+    
+    try:
+        with admission.admit(label, role or st.session_state.get("user_role"), show_queued):
+            notice.empty()
+            yield
+    finally:
+        notice.empty()
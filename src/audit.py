@@ -0,0 +1,138 @@
+"""
+Audit logging
+Write-behind audit writer: events are spooled to disk, queued in memory and inserted in batches
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from src import metrics
+from src.config import AUDIT_BATCH_SIZE, AUDIT_FLUSH_SECONDS, AUDIT_SPOOL_PATH
+from src.db import get_db, insert_audit_events
+
+
+class AuditWriter:
+    """
+    Buffers audit events and inserts them on a background thread once
+    batch_size events are waiting or flush_interval seconds have passed.
+    
+    Every event is appended to the spool file before it is queued, and the
+    spool is trimmed to the still-pending events after each committed batch,
+    so a crash loses nothing: the next writer replays the spool on start.
+    The trimmed spool is written beside the old one and swapped in with
+    os.replace, so the file on disk is always complete. Delivery is
+    at-least-once; a crash between commit and trim replays that batch.
+    """
+    
+    def __init__(self, spool_path: str, batch_size: int, flush_interval: float):
+        self.spool_path = Path(spool_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = []
+        self._spool = None
+        self._thread = None
+    
+    def start(self):
+        """Replay any spooled events from a previous process and start the flush thread"""
+        with self._lock:
+            self._start()
+    
+    def _start(self):
+        if self._spool is None:
+            self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+            if self.spool_path.exists():
+                with open(self.spool_path, encoding="utf-8") as spool:
+                    self._pending = [json.loads(line) for line in spool if line.strip()]
+                metrics.increment("audit.replayed", len(self._pending))
+            self._spool = open(self.spool_path, "a", encoding="utf-8")
+            
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+    
+    def log(self, user_id: int, action: str, table_name: str, record_id: int = None,
+            old_values: str = None, new_values: str = None):
+        event = {
+            "user_id": user_id,
+            "action": action,
+            "table_name": table_name,
+            "record_id": record_id,
+            "old_values": old_values,
+            "new_values": new_values,
+            "created_at": datetime.now().isoformat()
+        }
+        
+        with self._lock:
+            self._start()
+            self._spool.write(json.dumps(event) + "\n")
+            self._spool.flush()
+            self._pending.append(event)
+            pending = len(self._pending)
+        
+        if pending >= self.batch_size:
+            self._wakeup.set()
+    
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                # Events stay queued and spooled; the next interval retries
+                metrics.increment("audit.flush_failed")
+    
+    def flush(self) -> int:
+        """Insert everything queued so far in one transaction"""
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending[:]
+            
+            if not batch:
+                return 0
+            
+            start = time.perf_counter()
+            db = get_db()
+            try:
+                insert_audit_events(db, pd.DataFrame(batch))
+            finally:
+                db.close()
+            
+            with self._lock:
+                del self._pending[:len(batch)]
+                # Replace the spool with only the events that arrived during the insert;
+                # truncating it in place would lose them to a crash before the rewrite
+                trimmed = self.spool_path.with_name(f"{self.spool_path.name}.tmp")
+                with open(trimmed, "w", encoding="utf-8") as spool:
+                    spool.writelines(json.dumps(event) + "\n" for event in self._pending)
+                    spool.flush()
+                    os.fsync(spool.fileno())
+                self._spool.close()
+                os.replace(trimmed, self.spool_path)
+                self._spool = open(self.spool_path, "a", encoding="utf-8")
+            
+            metrics.increment("audit.flushed", len(batch))
+            metrics.observe("audit.flush", time.perf_counter() - start)
+            return len(batch)
+    
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+
+audit_writer = AuditWriter(AUDIT_SPOOL_PATH, AUDIT_BATCH_SIZE, AUDIT_FLUSH_SECONDS)
+
+
+def log_event(user_id: int, action: str, table_name: str, record_id: int = None,
+              old_values: str = None, new_values: str = None):
+    """Queue an audit event; returns immediately without touching the database"""
+    audit_writer.log(user_id, action, table_name, record_id, old_values, new_values)
@@ -6,17 +6,29 @@ Handles session management and authentication logic
 import streamlit as st
 import hashlib
 import hmac
+import secrets
 from datetime import datetime
+from src.config import PASSWORD_HASH_ITERATIONS
 
 
-def hash_password(password: str) -> str:
-    """Hash a password using SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+def hash_password(password: str, iterations: int = PASSWORD_HASH_ITERATIONS) -> str:
+    """Salted PBKDF2-SHA256 hash, stored as pbkdf2_sha256$iterations$salt$hash"""
+    salt = secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), iterations).hex()
+    return f"pbkdf2_sha256${iterations}${salt}${digest}"
 
 
 def verify_password(password: str, password_hash: str) -> bool:
-    """Verify a password against its hash using constant-time comparison"""
-    return hmac.compare_digest(hash_password(password), password_hash)
+    """
+    Verify a password against its hash using constant-time comparison.
+    Accepts PBKDF2 hashes and the legacy unsalted SHA-256 hex digests.
+    """
+    if password_hash.startswith("pbkdf2_sha256$"):
+        _, iterations, salt, digest = password_hash.split("$")
+        candidate = hashlib.pbkdf2_hmac("sha256", password.encode(), salt.encode(), int(iterations)).hex()
+        return hmac.compare_digest(candidate, digest)
+    
+    return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), password_hash)
 
 
 def initialize_session():
@@ -0,0 +1,361 @@
+"""
+Database backups
+Consistent, zstd-compressed Parquet snapshots stored by partition, so each backup only ships what changed
+"""
+
+import hashlib
+import json
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+import duckdb
+from src.config import (
+    BACKUP_DIR, BACKUP_S3_BUCKET, BACKUP_S3_ENDPOINT_URL, BACKUP_S3_PREFIX, COLD_STORAGE_DIR, DUCKDB_SETTINGS
+)
+
+
+# Tables split into year/month partitions on this column; every other table is backed up whole
+PARTITION_COLUMNS = {"sales": "date", "audit_log": "created_at"}
+
+TRANSFER_THREADS = 8
+
+
+class LocalBackupStore:
+    """Backup objects as files under root"""
+    
+    def __init__(self, root: str = BACKUP_DIR):
+        self.root = Path(root)
+    
+    def __str__(self):
+        return str(self.root)
+    
+    def keys(self, prefix: str = "") -> set:
+        base = self.root / prefix
+        if not base.exists():
+            return set()
+        return {path.relative_to(self.root).as_posix() for path in base.rglob("*") if path.is_file()}
+    
+    def put_file(self, path: Path, key: str):
+        target = self.root / key
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(f"{target.name}.partial")
+        shutil.copyfile(path, partial)
+        partial.replace(target)
+    
+    def get_file(self, key: str, path: Path):
+        shutil.copyfile(self.root / key, path)
+    
+    def put_bytes(self, data: bytes, key: str):
+        target = self.root / key
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+    
+    def get_bytes(self, key: str) -> bytes:
+        return (self.root / key).read_bytes()
+    
+    def delete(self, keys):
+        for key in keys:
+            (self.root / key).unlink(missing_ok=True)
+
+
+class S3BackupStore:
+    """Backup objects in an S3 bucket under prefix; endpoint_url points it at an S3-compatible store"""
+    
+    def __init__(self, bucket: str = BACKUP_S3_BUCKET, prefix: str = BACKUP_S3_PREFIX,
+                 endpoint_url: str = BACKUP_S3_ENDPOINT_URL):
+        import boto3
+        from botocore.config import Config
+        
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        # S3-compatible stores behind a custom endpoint rarely have per-bucket DNS names
+        config = Config(s3={"addressing_style": "path"}, max_pool_connections=TRANSFER_THREADS) if endpoint_url \
+            else Config(max_pool_connections=TRANSFER_THREADS)
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, config=config)
+    
+    def __str__(self):
+        return f"s3://{self.bucket}/{self.prefix}"
+    
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+    
+    def keys(self, prefix: str = "") -> set:
+        strip = len(self._key(""))
+        pages = self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=self._key(prefix))
+        return {item["Key"][strip:] for page in pages for item in page.get("Contents", [])}
+    
+    def put_file(self, path: Path, key: str):
+        self.client.upload_file(str(path), self.bucket, self._key(key))
+    
+    def get_file(self, key: str, path: Path):
+        self.client.download_file(self.bucket, self._key(key), str(path))
+    
+    def put_bytes(self, data: bytes, key: str):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+    
+    def get_bytes(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"].read()
+    
+    def delete(self, keys):
+        keys = list(keys)
+        for start in range(0, len(keys), 1000):
+            self.client.delete_objects(Bucket=self.bucket, Delete={
+                "Objects": [{"Key": self._key(key)} for key in keys[start:start + 1000]], "Quiet": True
+            })
+
+
+def backup_stores(backup_dir: str = BACKUP_DIR) -> list:
+    """The local backup directory, plus the S3 bucket when AWS_S3_BACKUP_BUCKET is set"""
+    stores = [LocalBackupStore(backup_dir)]
+    if BACKUP_S3_BUCKET:
+        stores.append(S3BackupStore())
+    return stores
+
+
+def _schema(db) -> dict:
+    """DDL for every user table, view and index, in an order that can be replayed"""
+    database = db.execute("SELECT current_database()").fetchone()[0]
+    return {
+        "tables": dict(db.execute("""
+            SELECT table_name, sql FROM duckdb_tables()
+            WHERE database_name = ? AND schema_name = 'main' AND NOT temporary ORDER BY table_name
+        """, [database]).fetchall()),
+        "views": dict(db.execute("""
+            SELECT view_name, sql FROM duckdb_views()
+            WHERE database_name = ? AND schema_name = 'main' AND NOT internal AND NOT temporary ORDER BY view_oid
+        """, [database]).fetchall()),
+        "indexes": [sql for (sql,) in db.execute("""
+            SELECT sql FROM duckdb_indexes() WHERE database_name = ? AND sql IS NOT NULL ORDER BY index_oid
+        """, [database]).fetchall()]
+    }
+
+
+def _partitions(db, table_name: str, ddl: str) -> list:
+    """
+    One entry per partition of table_name with its row count, the predicate
+    selecting it and an object key derived from its contents. The content
+    fingerprint is an order-independent sum of row hashes, so a partition
+    whose rows did not change keeps its key whatever the physical layout.
+    """
+    column = PARTITION_COLUMNS.get(table_name)
+    if column:
+        groups = db.execute(f"""
+            SELECT year({column}), month({column}), COUNT(*), SUM(hash(t)::HUGEINT)
+            FROM {table_name} t GROUP BY ALL ORDER BY ALL
+        """).fetchall()
+    else:
+        groups = [(None, None, *db.execute(f"SELECT COUNT(*), SUM(hash(t)::HUGEINT) FROM {table_name} t").fetchone())]
+    
+    partitions = []
+    for year, month, rows, row_hash in groups:
+        if not rows:
+            continue
+        if column:
+            name = f"year={year}/month={month}"
+            predicate = (f"year({column}) IS NOT DISTINCT FROM {'NULL' if year is None else year} "
+                         f"AND month({column}) IS NOT DISTINCT FROM {'NULL' if month is None else month}")
+        else:
+            name, predicate = "all", "TRUE"
+        
+        fingerprint = hashlib.sha256(f"{ddl}|{rows}|{row_hash}".encode()).hexdigest()[:24]
+        partitions.append({
+            "partition": name,
+            "rows": rows,
+            "predicate": predicate,
+            "object": f"objects/{table_name}/{name}/{fingerprint}.parquet"
+        })
+    
+    return partitions
+
+
+def _transfer(jobs):
+    """Run (function, *args) jobs on TRANSFER_THREADS threads, re-raising the first failure"""
+    with ThreadPoolExecutor(max_workers=TRANSFER_THREADS, thread_name_prefix="backup") as pool:
+        for future in [pool.submit(*job) for job in jobs]:
+            future.result()
+
+
+def backup_database(db, stores: list, cold_dir: str = COLD_STORAGE_DIR) -> dict:
+    """
+    Write an incremental snapshot of db to every store.
+    
+    All tables are read in one transaction, so the snapshot is consistent
+    while the dashboard and syncs keep writing. Each table partition becomes
+    a zstd-compressed Parquet object named after its contents; only objects
+    a store does not already hold are exported and uploaded, so an unchanged
+    month costs a scan but no I/O. Cold-tier Parquet files are immutable and
+    copied once; they are listed inside the same transaction, so the set
+    matches the snapshot's views. A JSON manifest listing every object the snapshot needs is
+    written last, so a backup interrupted midway is never picked for restore.
+    """
+    start = time.perf_counter()
+    name = datetime.now().strftime("%Y%m%dT%H%M%S")
+    existing = [store.keys("objects/") | store.keys("cold/") for store in stores]
+    manifest = {"name": name, "created_at": datetime.now().isoformat(), "tables": {}, "cold_files": [],
+                "cold_dir": Path(cold_dir).as_posix()}
+    
+    scratch = Path(DUCKDB_SETTINGS["temp_directory"])
+    scratch.mkdir(parents=True, exist_ok=True)
+    
+    with tempfile.TemporaryDirectory(prefix="backup_", dir=scratch) as tmp_dir:
+        exports = {}
+        
+        db.execute("BEGIN TRANSACTION")
+        try:
+            manifest["schema"] = _schema(db)
+            for table_name, ddl in manifest["schema"]["tables"].items():
+                partitions = _partitions(db, table_name, ddl)
+                manifest["tables"][table_name] = [
+                    {key: partition[key] for key in ("partition", "rows", "object")} for partition in partitions
+                ]
+                
+                for partition in partitions:
+                    key = partition["object"]
+                    if key in exports or all(key in keys for keys in existing):
+                        continue
+                    path = Path(tmp_dir) / f"{len(exports)}.parquet"
+                    db.execute(f"""
+                        COPY (SELECT * FROM {table_name} WHERE {partition['predicate']})
+                        TO '{path.as_posix()}' (FORMAT PARQUET, COMPRESSION ZSTD)
+                    """)
+                    exports[key] = path
+            
+            # Tiering moves rows and files in one transaction, so list them while the snapshot is open
+            for path in sorted(Path(cold_dir).rglob("*.parquet")):
+                key = f"cold/{path.relative_to(cold_dir).as_posix()}"
+                manifest["cold_files"].append({"path": path.relative_to(cold_dir).as_posix(), "object": key})
+                exports.setdefault(key, path)
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        export_seconds = time.perf_counter() - start
+        
+        jobs = [
+            (store.put_file, path, key)
+            for store, keys in zip(stores, existing)
+            for key, path in exports.items() if key not in keys
+        ]
+        _transfer(jobs)
+        
+        manifest["rows"] = sum(partition["rows"] for table in manifest["tables"].values() for partition in table)
+        manifest["uploaded_objects"] = len(jobs)
+        manifest["uploaded_bytes"] = sum(path.stat().st_size for _, path, _ in jobs)
+        manifest["seconds"] = time.perf_counter() - start
+        
+        for store in stores:
+            store.put_bytes(json.dumps(manifest, indent=2).encode(), f"manifests/{name}.json")
+    
+    return {
+        "manifest": name,
+        "rows": manifest["rows"],
+        "objects": sum(len(table) for table in manifest["tables"].values()) + len(manifest["cold_files"]),
+        "uploaded_objects": manifest["uploaded_objects"],
+        "uploaded_bytes": manifest["uploaded_bytes"],
+        "export_seconds": export_seconds,
+        "seconds": manifest["seconds"]
+    }
+
+
+def list_backups(store) -> list:
+    """Manifest names in store, oldest first"""
+    return sorted(Path(key).stem for key in store.keys("manifests/") if key.endswith(".json"))
+
+
+def restore_database(store, target_path: str, manifest: str = None, cold_dir: str = None) -> dict:
+    """
+    Rebuild the snapshot named manifest (the latest by default) from store
+    into a new database file at target_path, with its cold-tier files in a
+    new cold_dir (default: <target stem>_cold next to the file) that the
+    restored views read from. Nothing under the live COLD_STORAGE_DIR is
+    touched. To swap the result in, stop the dashboard, move the file into
+    place and point COLD_STORAGE_DIR at the restored cold directory.
+    """
+    start = time.perf_counter()
+    target = Path(target_path)
+    if target.exists():
+        raise FileExistsError(f"{target} already exists; restore into a new path")
+    cold = Path(cold_dir) if cold_dir else target.with_name(f"{target.stem}_cold")
+    if cold.exists() and any(cold.iterdir()):
+        raise FileExistsError(f"{cold} is not empty; restore cold files into a new directory")
+    
+    backups = list_backups(store)
+    if not backups:
+        raise FileNotFoundError(f"No backups in {store}")
+    name = manifest or backups[-1]
+    manifest = json.loads(store.get_bytes(f"manifests/{name}.json"))
+    
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="restore_", dir=target.parent) as tmp_dir:
+        files = {}
+        for table_name, partitions in manifest["tables"].items():
+            files[table_name] = [Path(tmp_dir) / f"{table_name}_{i}.parquet" for i in range(len(partitions))]
+        
+        jobs = [
+            (store.get_file, partition["object"], path)
+            for table_name, partitions in manifest["tables"].items()
+            for partition, path in zip(partitions, files[table_name])
+        ]
+        for cold_file in manifest["cold_files"]:
+            path = cold / cold_file["path"]
+            path.parent.mkdir(parents=True, exist_ok=True)
+            jobs.append((store.get_file, cold_file["object"], path))
+        _transfer(jobs)
+        download_seconds = time.perf_counter() - start
+        downloaded_bytes = sum(path.stat().st_size for _, _, path in jobs)
+        
+        db = duckdb.connect(str(target), config=DUCKDB_SETTINGS)
+        try:
+            for table_name, ddl in manifest["schema"]["tables"].items():
+                db.execute(ddl)
+                if files[table_name]:
+                    sources = ", ".join(f"'{path.as_posix()}'" for path in files[table_name])
+                    db.execute(f"INSERT INTO {table_name} BY NAME SELECT * FROM read_parquet([{sources}])")
+            # Views glob the cold tier by path; repoint them at the restored copy
+            backed_up_cold = manifest.get("cold_dir", Path(COLD_STORAGE_DIR).as_posix())
+            for ddl in manifest["schema"]["views"].values():
+                db.execute(ddl.replace(f"'{backed_up_cold}/", f"'{cold.as_posix()}/"))
+            for ddl in manifest["schema"]["indexes"]:
+                db.execute(ddl)
+            db.execute("CHECKPOINT")
+        except Exception:
+            db.close()
+            target.unlink(missing_ok=True)
+            Path(f"{target}.wal").unlink(missing_ok=True)
+            raise
+        db.close()
+    
+    return {
+        "manifest": name,
+        "rows": manifest["rows"],
+        "cold_dir": cold.as_posix(),
+        "downloaded_bytes": downloaded_bytes,
+        "download_seconds": download_seconds,
+        "load_seconds": time.perf_counter() - start - download_seconds,
+        "seconds": time.perf_counter() - start
+    }
+
+
+def prune_backups(store, days: int, keep: int = 1) -> dict:
+    """
+    Drop manifests older than days (always keeping the newest keep) and
+    delete every object no remaining manifest refers to.
+    """
+    backups = list_backups(store)
+    cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y%m%dT%H%M%S")
+    expired = [name for name in backups[:max(len(backups) - keep, 0)] if name < cutoff]
+    store.delete(f"manifests/{name}.json" for name in expired)
+    
+    referenced = set()
+    for name in backups[len(expired):]:
+        manifest = json.loads(store.get_bytes(f"manifests/{name}.json"))
+        referenced.update(partition["object"] for table in manifest["tables"].values() for partition in table)
+        referenced.update(cold_file["object"] for cold_file in manifest["cold_files"])
+    
+    orphaned = (store.keys("objects/") | store.keys("cold/")) - referenced
+    store.delete(orphaned)
+    
+    return {"manifests": len(expired), "objects": len(orphaned)}
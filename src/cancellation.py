@@ -0,0 +1,122 @@
+"""
+Query cancellation
+Interrupts a session's running DuckDB queries once Streamlit has asked that run to stop
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+import duckdb
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from src import metrics
+
+
+POLL_INTERVAL_SECONDS = 0.1
+# ScriptRequests has kept its pending request in _state since 1.14 (checked through 1.66)
+SCRIPT_REQUESTS_STATE_SINCE = (1, 14)
+
+_lock = threading.Lock()
+_running = {}
+_watcher = None
+
+
+def begin_run() -> int:
+    """Start a new run id for this session; call once at the top of every script run"""
+    st.session_state.run_id = st.session_state.get("run_id", 0) + 1
+    return st.session_state.run_id
+
+
+def _streamlit_version() -> tuple:
+    parts = []
+    for part in st.__version__.split(".")[:2]:
+        if not part.isdigit():
+            break
+        parts.append(int(part))
+    return tuple(parts)
+
+
+def _pending_request(ctx):
+    """
+    Name of the request Streamlit has queued for this run (CONTINUE, RERUN or
+    STOP), or None where the private ScriptRequests state can't be read. None
+    disables cancellation: queries simply run to completion.
+    """
+    if _streamlit_version() < SCRIPT_REQUESTS_STATE_SINCE:
+        return None
+    requests = getattr(ctx, "script_requests", None)
+    state = getattr(requests, "_state", None)
+    return getattr(state, "name", None)
+
+
+def _stop_requested(ctx) -> bool:
+    # A rerun (new widget interaction or navigation) or a disconnect leaves a
+    # pending request that Streamlit only acts on at the script's next yield point
+    return _pending_request(ctx) not in (None, "CONTINUE")
+
+
+def _watch():
+    global _watcher
+    
+    while True:
+        time.sleep(POLL_INTERVAL_SECONDS)
+        
+        with _lock:
+            if not _running:
+                _watcher = None
+                return
+            queries = list(_running.values())
+        
+        for query in queries:
+            if not query["interrupted"] and _stop_requested(query["ctx"]):
+                query["interrupted"] = True
+                query["db"].interrupt()
+
+
+@contextmanager
+def cancellable(db, label: str):
+    """
+    Run the block's queries so that they are interrupted if the session reruns
+    or disconnects before they finish. Outside a Streamlit run this is a no-op.
+    """
+    global _watcher
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        yield
+        return
+    
+    token = object()
+    query = {
+        "ctx": ctx,
+        "run_id": st.session_state.get("run_id"),
+        "db": db,
+        "label": label,
+        "interrupted": False
+    }
+    
+    with _lock:
+        _running[token] = query
+        if _watcher is None:
+            _watcher = threading.Thread(target=_watch, name="query-cancellation", daemon=True)
+            _watcher.start()
+    
+    try:
+        yield
+    except duckdb.InterruptException:
+        metrics.increment(f"queries.cancelled.{label}")
+        # Reach a yield point so Streamlit acts on the pending rerun or stop;
+        # st.stop() would overwrite a pending rerun and drop the user's click
+        st.empty()
+        raise
+    finally:
+        with _lock:
+            _running.pop(token, None)
+
+
+def running_queries() -> list:
+    """Session and run ids of the queries currently in flight"""
+    with _lock:
+        return [
+            {"session_id": query["ctx"].session_id, "run_id": query["run_id"], "label": query["label"]}
+            for query in _running.values()
+        ]
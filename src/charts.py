@@ -0,0 +1,173 @@
+"""
+Chart helpers
+Adaptive time bucketing, downsampling and figure caching for charts
+"""
+
+import json
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from src.config import CHART_POINT_BUDGET, CHART_WIDTH_PX, FIGURE_CACHE_MAX_MB, FIGURE_CACHE_MAX_ENTRIES
+
+
+GRANULARITY_DAYS = {"day": 1, "week": 7, "month": 30}
+
+# Buckets fetched per plotted point, so LTTB has some shape left to choose from
+LTTB_OVERSAMPLE = 4
+
+MIN_PX_PER_POINT = 2
+
+
+def point_budget(width_px: int = None) -> int:
+    """Maximum number of points a trend chart should plot at the given width"""
+    width_px = width_px or CHART_WIDTH_PX
+    return max(3, min(CHART_POINT_BUDGET, width_px // MIN_PX_PER_POINT))
+
+
+def choose_granularity(date_from, date_to, width_px: int = None) -> str:
+    """
+    Pick the finest bucket size that keeps the range within the point budget.
+    
+    Returns:
+        str: "day", "week" or "month"
+    """
+    max_buckets = point_budget(width_px) * LTTB_OVERSAMPLE
+    span_days = max((pd.Timestamp(date_to) - pd.Timestamp(date_from)).days + 1, 1)
+    
+    for granularity, days in GRANULARITY_DAYS.items():
+        if span_days / days <= max_buckets:
+            return granularity
+    
+    return "month"
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    
+    Returns the indices of the points to keep, always including the first
+    and last point. x must be numeric and sorted ascending.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    
+    return selected
+
+
+def downsample_trend(df: pd.DataFrame, x_col: str, y_col: str, width_px: int = None) -> pd.DataFrame:
+    """Reduce a sorted trend frame to the point budget, keeping its visual shape"""
+    budget = point_budget(width_px)
+    if len(df) <= budget:
+        return df
+    
+    x = pd.to_datetime(df[x_col]).astype("int64").to_numpy()
+    idx = lttb_indices(x, df[y_col].to_numpy(), budget)
+    return df.iloc[idx]
+
+
+class FigureCache:
+    """Process-wide LRU cache of serialised Plotly figure specs"""
+    
+    def __init__(self, max_bytes: int, max_entries: int):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key):
+        with self._lock:
+            spec = self._entries.get(key)
+            if spec is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return spec
+    
+    def put(self, key, spec: str):
+        size = len(spec)
+        if size > self.max_bytes:
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            
+            self._entries[key] = spec
+            self._bytes += size
+            
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+figure_cache = FigureCache(FIGURE_CACHE_MAX_MB * 1024 * 1024, FIGURE_CACHE_MAX_ENTRIES)
+
+
+def cached_figure(chart_id: str, scope: tuple, params: tuple, data_version: tuple, build) -> go.Figure:
+    """
+    Return the figure for chart_id, building it only when no spec is cached
+    for the same role scope, filter params and data version.
+    
+    Args:
+        build: Zero-argument callable returning a go.Figure
+    """
+    key = (chart_id, scope, params, data_version)
+    spec = figure_cache.get(key)
+    
+    if spec is None:
+        fig = build()
+        figure_cache.put(key, fig.to_json())
+        return fig
+    
+    # The spec was produced by a validated figure, so skip re-validation
+    return go.Figure(json.loads(spec), _validate=False)
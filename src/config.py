@@ -1,6 +1,45 @@
+import os
 import streamlit as st
 
 
+CHART_POINT_BUDGET = int(os.getenv("CHART_POINT_BUDGET", "500"))
+CHART_WIDTH_PX = int(os.getenv("CHART_WIDTH_PX", "1200"))
+FIGURE_CACHE_MAX_MB = int(os.getenv("FIGURE_CACHE_MAX_MB", "64"))
+FIGURE_CACHE_MAX_ENTRIES = int(os.getenv("FIGURE_CACHE_MAX_ENTRIES", "1000"))
+MAX_HEAVY_QUERIES = int(os.getenv("MAX_HEAVY_QUERIES", "4"))
+MAX_QUEUED_QUERIES = int(os.getenv("MAX_QUEUED_QUERIES", "20"))
+QUERY_QUEUE_TIMEOUT_SECONDS = float(os.getenv("QUERY_QUEUE_TIMEOUT_SECONDS", "60"))
+QUERY_ROW_BUDGET = int(os.getenv("QUERY_ROW_BUDGET", "1000000"))
+COLD_STORAGE_DIR = os.getenv("COLD_STORAGE_DIR", "data/cold")
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_SECONDS = float(os.getenv("AUDIT_FLUSH_SECONDS", "2"))
+AUDIT_SPOOL_PATH = os.getenv("AUDIT_SPOOL_PATH", "data/audit_spool.jsonl")
+AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "30"))
+IMPORT_CHUNK_ROWS = int(os.getenv("IMPORT_CHUNK_ROWS", "100000"))
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "600000"))
+BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
+BACKUP_RETENTION_DAYS = int(os.getenv("BACKUP_RETENTION_DAYS", "30"))
+BACKUP_S3_BUCKET = os.getenv("AWS_S3_BACKUP_BUCKET") or None
+BACKUP_S3_PREFIX = os.getenv("BACKUP_S3_PREFIX", "backups")
+BACKUP_S3_ENDPOINT_URL = os.getenv("AWS_S3_ENDPOINT_URL") or None
+
+# DuckDB applies these to the whole database instance, shared by every session
+DUCKDB_SETTINGS = {
+    "memory_limit": os.getenv("DUCKDB_MEMORY_LIMIT", "2GB"),
+    "threads": int(os.getenv("DUCKDB_THREADS", "4")),
+    "temp_directory": os.getenv("DUCKDB_TEMP_DIRECTORY", "data/tmp"),
+    "max_temp_directory_size": os.getenv("DUCKDB_MAX_TEMP_DIRECTORY_SIZE", "20GB"),
+    "preserve_insertion_order": os.getenv("DUCKDB_PRESERVE_INSERTION_ORDER", "true").lower() == "true"
+}
+
+# Per-role share of the heavy query slots, since memory and threads cannot be limited per connection
+ROLE_MAX_HEAVY_QUERIES = {
+    "admin": int(os.getenv("ADMIN_MAX_HEAVY_QUERIES", str(MAX_HEAVY_QUERIES))),
+    "manager": int(os.getenv("MANAGER_MAX_HEAVY_QUERIES", "2")),
+    "user": int(os.getenv("USER_MAX_HEAVY_QUERIES", "1"))
+}
+
+
 def set_page_config():
     st.set_page_config(
         page_title="Dashboard",
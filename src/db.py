@@ -1,9 +1,16 @@
 import duckdb
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+import pyarrow as pa
+from datetime import datetime, timedelta
 import hashlib
+import time
 from pathlib import Path
+from src import metrics
+from src.admission import QueryRejected, admit_heavy
+from src.auth import verify_password
+from src.cancellation import cancellable
+from src.config import COLD_STORAGE_DIR, DUCKDB_SETTINGS, QUERY_ROW_BUDGET
 
 
 DB_PATH = "data/dashboard.duckdb"
@@ -15,12 +22,37 @@ def ensure_db_dir():
 
 def get_db():
     ensure_db_dir()
-    return duckdb.connect(DB_PATH)
+    return duckdb.connect(DB_PATH, config=DUCKDB_SETTINGS)
+
+
+def get_resource_usage(db) -> dict:
+    settings = dict(db.execute("""
+        SELECT name, value FROM duckdb_settings()
+        WHERE name IN ('memory_limit', 'threads', 'temp_directory', 'max_temp_directory_size', 'preserve_insertion_order')
+    """).fetchall())
+    memory_bytes, temp_bytes = db.execute("""
+        SELECT COALESCE(SUM(memory_usage_bytes), 0), COALESCE(SUM(temporary_storage_bytes), 0)
+        FROM duckdb_memory()
+    """).fetchone()
+    temp_files = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM duckdb_temporary_files()").fetchone()
+    
+    return {
+        "settings": settings,
+        "memory_bytes": memory_bytes,
+        "temp_storage_bytes": temp_bytes,
+        "temp_files": temp_files[0],
+        "temp_files_bytes": temp_files[1]
+    }
 
 
 def initialize_database():
     db = get_db()
-    
+    create_schema(db)
+    seed_demo_data(db)
+    db.close()
+
+
+def create_schema(db):
     db.execute("""
         CREATE TABLE IF NOT EXISTS users (
             id INTEGER PRIMARY KEY,
@@ -33,19 +65,7 @@ def initialize_database():
         )
     """)
     
-    db.execute("""
-        CREATE TABLE IF NOT EXISTS sales (
-            id INTEGER PRIMARY KEY,
-            date DATE NOT NULL,
-            user_id INTEGER NOT NULL,
-            product_name VARCHAR NOT NULL,
-            quantity INTEGER NOT NULL,
-            unit_price DECIMAL(10, 2) NOT NULL,
-            total_amount DECIMAL(10, 2) NOT NULL,
-            region VARCHAR NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+    _create_sales_table(db, "sales")
     
     db.execute("""
         CREATE TABLE IF NOT EXISTS products (
@@ -71,8 +91,179 @@ def initialize_database():
         )
     """)
     
-    seed_demo_data(db)
-    db.close()
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS sales_cube (
+            month DATE,
+            region VARCHAR,
+            category VARCHAR,
+            user_id INTEGER,
+            grouping_id INTEGER NOT NULL,
+            quantity BIGINT NOT NULL,
+            total_amount DECIMAL(18, 2) NOT NULL,
+            transactions BIGINT NOT NULL
+        )
+    """)
+    
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS cube_refresh_state (
+            cube_name VARCHAR PRIMARY KEY,
+            last_sale_id INTEGER NOT NULL,
+            refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS import_progress (
+            file_path VARCHAR PRIMARY KEY,
+            file_size BIGINT,
+            file_mtime DOUBLE,
+            rows_loaded BIGINT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    migrate_sales_product_ids(db)
+    # Runs on every rerun: only create the views when missing, since replacing them
+    # writes the catalog and conflicts with concurrent sessions. Their Parquet globs are
+    # resolved at query time; the tiering and retention jobs recreate them when cold files change.
+    if not _view_exists(db, "sales_all"):
+        refresh_sales_view(db)
+    if not _view_exists(db, "audit_log_all"):
+        refresh_audit_view(db)
+    
+    # A database that already had sales before the cube existed has no watermark yet, and
+    # only seeding and the sync jobs refresh it: build it once so analytics aren't empty
+    if not db.execute("SELECT COUNT(*) FROM cube_refresh_state WHERE cube_name = 'sales_cube'").fetchone()[0]:
+        try:
+            refresh_sales_cube(db)
+        except duckdb.TransactionException:
+            # Another session built it first
+            pass
+
+
+def _view_exists(db, view_name: str) -> bool:
+    return db.execute(
+        "SELECT COUNT(*) FROM duckdb_views() WHERE view_name = ? AND NOT temporary", [view_name]
+    ).fetchone()[0] > 0
+
+
+def _create_sales_table(db, table_name: str):
+    db.execute(f"""
+        CREATE TABLE IF NOT EXISTS {table_name} (
+            id INTEGER PRIMARY KEY,
+            date DATE NOT NULL,
+            user_id INTEGER NOT NULL,
+            product_id INTEGER NOT NULL,
+            quantity INTEGER NOT NULL,
+            unit_price DECIMAL(10, 2) NOT NULL,
+            total_amount DECIMAL(10, 2) NOT NULL,
+            region VARCHAR NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def add_missing_products(db, names_query: str) -> int:
+    """
+    Register product names that are not in products yet, in one statement.
+    names_query must return (name, price); new products are 'Uncategorized' with no stock.
+    """
+    return db.execute(f"""
+        INSERT INTO products (id, name, category, price, stock_quantity)
+        SELECT
+            (SELECT COALESCE(MAX(id), 0) FROM products) + row_number() OVER (ORDER BY n.name),
+            n.name, 'Uncategorized', COALESCE(n.price, 0), 0
+        FROM ({names_query}) n
+        WHERE n.name IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM products p WHERE p.name = n.name)
+    """).fetchone()[0]
+
+
+def migrate_sales_product_ids(db):
+    """Replace sales.product_name with an integer product_id, backfilled from products by name"""
+    legacy = db.execute(
+        "SELECT COUNT(*) FROM duckdb_columns() WHERE table_name = 'sales' AND column_name = 'product_name'"
+    ).fetchone()[0]
+    if not legacy:
+        return
+    
+    db.execute("BEGIN TRANSACTION")
+    try:
+        add_missing_products(db, "SELECT product_name AS name, MAX(unit_price) AS price FROM sales GROUP BY 1")
+        # Rebuild rather than ALTER: DuckDB cannot add the NOT NULL constraint after an UPDATE in the same transaction
+        _create_sales_table(db, "sales_migrated")
+        db.execute("""
+            INSERT INTO sales_migrated
+            SELECT s.id, s.date, s.user_id, p.id, s.quantity, s.unit_price, s.total_amount, s.region, s.created_at
+            FROM sales s
+            JOIN products p ON p.name = s.product_name
+            ORDER BY s.date, s.user_id
+        """)
+        db.execute("DROP TABLE sales")
+        db.execute("ALTER TABLE sales_migrated RENAME TO sales")
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+
+
+# Cold Parquet keeps product_name so archived months stay self-describing
+SALES_VIEW_COLUMNS = "id, date, user_id, product_name, quantity, unit_price, total_amount, region, created_at"
+
+HOT_SALES_QUERY = """
+    SELECT s.id, s.date, s.user_id, s.product_id, p.name AS product_name, s.quantity,
+           s.unit_price, s.total_amount, s.region, s.created_at,
+           year(s.date) AS year, month(s.date) AS month
+    FROM sales s
+    LEFT JOIN products p ON p.id = s.product_id
+"""
+
+
+def refresh_sales_view(db):
+    """
+    (Re)create sales_all: hot rows from the sales table plus the closed months
+    archived as hive-partitioned Parquet under COLD_STORAGE_DIR/sales.
+    Both halves expose year and month so partition filters prune cold files.
+    """
+    query = HOT_SALES_QUERY
+    
+    cold_files = _cold_files("sales")
+    if cold_files:
+        query += f"""
+        UNION ALL
+        SELECT c.id, c.date, c.user_id, p.id AS product_id, c.product_name, c.quantity,
+               c.unit_price, c.total_amount, c.region, c.created_at, c.year, c.month
+        FROM read_parquet('{cold_files}', hive_partitioning = true) c
+        LEFT JOIN products p ON p.name = c.product_name
+        """
+    
+    db.execute(f"CREATE OR REPLACE VIEW sales_all AS {query}")
+
+
+AUDIT_COLUMNS = "id, user_id, action, table_name, record_id, old_values, new_values, created_at"
+
+
+def refresh_audit_view(db):
+    """(Re)create audit_log_all: the hot audit_log table plus its monthly Parquet partitions"""
+    query = f"SELECT {AUDIT_COLUMNS}, year(created_at) AS year, month(created_at) AS month FROM audit_log"
+    
+    cold_files = _cold_files("audit_log")
+    if cold_files:
+        query += f"""
+        UNION ALL
+        SELECT {AUDIT_COLUMNS}, year, month
+        FROM read_parquet('{cold_files}', hive_partitioning = true)
+        """
+    
+    db.execute(f"CREATE OR REPLACE VIEW audit_log_all AS {query}")
+
+
+def _cold_files(table_name: str):
+    """Glob over table_name's year=/month= Parquet partitions, or None if there are none"""
+    cold_dir = Path(COLD_STORAGE_DIR) / table_name
+    if any(cold_dir.glob("*/*/*.parquet")):
+        return f"{cold_dir.as_posix()}/*/*/*.parquet"
+    return None
 
 
 def seed_demo_data(db):
@@ -112,9 +303,10 @@ def seed_demo_data(db):
                     [product_id, name, category, price, stock]
                 )
         
-        existing_sales = db.execute("SELECT COUNT(*) as cnt FROM sales").fetchall()[0][0]
+        existing_sales = db.execute("SELECT COUNT(*) as cnt FROM sales_all").fetchall()[0][0]
+        seeded_sales = existing_sales == 0
         
-        if existing_sales == 0:
+        if seeded_sales:
             import random
             from datetime import datetime, timedelta
             
@@ -126,33 +318,35 @@ def seed_demo_data(db):
                 product_id = random.randint(1, 8)
                 quantity = random.randint(1, 10)
                 
-                product = db.execute("SELECT price, name FROM products WHERE id = ?", [product_id]).fetchall()
+                product = db.execute("SELECT price FROM products WHERE id = ?", [product_id]).fetchall()
                 if product:
                     unit_price = float(product[0][0])
-                    product_name = product[0][1]
                     total_amount = unit_price * quantity
                     
                     db.execute(
                         """INSERT INTO sales 
-                        (id, date, user_id, product_name, quantity, unit_price, total_amount, region) 
+                        (id, date, user_id, product_id, quantity, unit_price, total_amount, region) 
                         VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
-                        [sale_id, date, user_id, product_name, quantity, unit_price, total_amount, random.choice(regions)]
+                        [sale_id, date, user_id, product_id, quantity, unit_price, total_amount, random.choice(regions)]
                     )
         
         db.commit()
+        
+        # Otherwise the cube is only refreshed by the sync and import jobs that add sales
+        if seeded_sales:
+            refresh_sales_cube(db)
     except Exception as e:
         st.warning(f"Demo data already exists or initialization skipped: {str(e)}")
 
 
 def check_user_credentials(db, username: str, password: str):
     try:
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
         result = db.execute(
-            "SELECT username, email, role FROM users WHERE username = ? AND password_hash = ? AND is_active = TRUE",
-            [username, password_hash]
+            "SELECT username, email, role, password_hash FROM users WHERE username = ? AND is_active = TRUE",
+            [username]
         ).fetchall()
         
-        if result:
+        if result and verify_password(password, result[0][3]):
             row = result[0]
             return {
                 "username": row[0],
@@ -170,6 +364,35 @@ def user_exists(db, username: str) -> bool:
     return result[0][0] > 0
 
 
+def new_users(db, data) -> pd.DataFrame:
+    """Rows of data whose username and email are both unused, found with one anti-join"""
+    db.register("incoming_users", data)
+    try:
+        return db.execute("""
+            SELECT i.*
+            FROM incoming_users i
+            ANTI JOIN users by_name ON by_name.username = i.username
+            ANTI JOIN users by_email ON by_email.email = i.email
+        """).df()
+    finally:
+        db.unregister("incoming_users")
+
+
+def bulk_insert_users(db, data) -> int:
+    """Append users (username, email, password_hash, role) in one statement, continuing ids from the maximum"""
+    db.register("incoming_users", data)
+    try:
+        return db.execute("""
+            INSERT INTO users (id, username, email, password_hash, role)
+            SELECT
+                (SELECT COALESCE(MAX(id), 0) FROM users) + row_number() OVER (),
+                username, email, password_hash, role
+            FROM incoming_users
+        """).fetchone()[0]
+    finally:
+        db.unregister("incoming_users")
+
+
 def create_user(db, user_data: dict) -> bool:
     try:
         db.execute(
@@ -190,24 +413,257 @@ def create_user(db, user_data: dict) -> bool:
         return False
 
 
-def get_sales_with_rls(db, user_role: str, user_id: int) -> pd.DataFrame:
+def _date_range_filter(date_from=None, date_to=None, alias: str = "s", column: str = "date"):
+    """
+    Inclusive range predicate on a date column of sales_all or audit_log_all,
+    repeated on the year/month partition columns so cold partitions are pruned.
+    """
+    clauses, params = [], []
+    
+    if date_from is not None:
+        clauses.append(
+            f"{alias}.{column} >= ? AND ({alias}.year > ? OR ({alias}.year = ? AND {alias}.month >= ?))"
+        )
+        params += [date_from, date_from.year, date_from.year, date_from.month]
+    
+    if date_to is not None:
+        clauses.append(
+            f"{alias}.{column} <= ? AND ({alias}.year < ? OR ({alias}.year = ? AND {alias}.month <= ?))"
+        )
+        params += [date_to, date_to.year, date_to.year, date_to.month]
+    
+    return " AND ".join(clauses) or "TRUE", params
+
+
+def _sales_rls_filter(user_role: str, user_id: int):
     if user_role == "admin":
-        query = "SELECT * FROM sales ORDER BY date DESC"
-        return db.execute(query).df()
+        return "TRUE", []
     elif user_role == "manager":
-        query = """
-        SELECT s.* FROM sales s
-        WHERE s.date >= CURRENT_DATE - INTERVAL 90 DAY
-        ORDER BY s.date DESC
-        """
-        return db.execute(query).df()
+        return _date_range_filter(datetime.now().date() - timedelta(days=90))
     else:
-        query = """
-        SELECT s.* FROM sales s
-        WHERE s.user_id = ?
-        ORDER BY s.date DESC
-        """
-        return db.execute(query, [user_id]).df()
+        return "s.user_id = ?", [user_id]
+
+
+def rls_scope(user_role: str, user_id: int) -> tuple:
+    """Key identifying which sales rows a role can see, for result caching"""
+    if user_role == "admin":
+        return (user_role,)
+    elif user_role == "manager":
+        return (user_role, datetime.now().date().isoformat())
+    else:
+        return (user_role, user_id)
+
+
+def get_data_version(db, table_name: str = "sales") -> tuple:
+    return tuple(db.execute(f"SELECT COUNT(*), MAX(created_at) FROM {table_name}").fetchone())
+
+
+SALES_COLUMNS = ("id", "date", "user_id", "product_name", "quantity", "unit_price", "total_amount", "region")
+
+
+def compact_sales_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Store repeated strings as categoricals and downcast integer columns"""
+    for col in ("region", "product_name"):
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    
+    for col in ("id", "user_id", "quantity"):
+        if col in df.columns:
+            df[col] = df[col].astype("int32")
+    
+    return df
+
+
+def _sales_where(user_role: str, user_id: int, regions=None):
+    where, params = _sales_rls_filter(user_role, user_id)
+    
+    if regions is not None:
+        where += " AND list_contains(?, s.region)"
+        params.append(list(regions))
+    
+    return where, params
+
+
+def _sales_query(user_role: str, user_id: int, columns, regions=None, sort_column: str = "date",
+                 ascending: bool = False, limit: int = None):
+    unknown = set(columns) - set(SALES_COLUMNS)
+    if sort_column not in SALES_COLUMNS:
+        unknown.add(sort_column)
+    if unknown:
+        raise ValueError(f"Unknown sales columns: {sorted(unknown)}")
+    
+    where, params = _sales_where(user_role, user_id, regions)
+    
+    select_list = ", ".join(f"s.{col}" for col in columns)
+    query = f"""
+    SELECT {select_list} FROM sales_all s
+    WHERE {where}
+    ORDER BY s.{sort_column} {"ASC" if ascending else "DESC"}
+    """
+    
+    if limit is not None:
+        query += f"LIMIT {int(limit)}"
+    
+    return query, params
+
+
+def _sales_row_limit(db, user_role: str, user_id: int, regions=None, over_budget: str = "downgrade",
+                     sort_column: str = "date", ascending: bool = False):
+    """
+    Check the result size against QUERY_ROW_BUDGET before fetching.
+    sort_column and ascending describe the query's order, i.e. which rows a downgrade keeps.
+    
+    Returns:
+        int: Row limit to apply, or None when the result fits the budget
+    """
+    where, params = _sales_where(user_role, user_id, regions)
+    rows = db.execute(f"SELECT COUNT(*) FROM sales_all s WHERE {where}", params).fetchone()[0]
+    
+    if rows <= QUERY_ROW_BUDGET:
+        return None
+    
+    if over_budget == "reject":
+        metrics.increment("admission.rejected.over_budget")
+        raise QueryRejected(f"Result of {rows:,} rows exceeds the {QUERY_ROW_BUDGET:,} row budget")
+    
+    metrics.increment("admission.downgraded")
+    if sort_column == "date":
+        kept = "oldest" if ascending else "most recent"
+    else:
+        kept = f"{'lowest' if ascending else 'highest'} {sort_column.replace('_', ' ')}"
+    st.warning(f"Showing the {QUERY_ROW_BUDGET:,} {kept} of {rows:,} matching rows")
+    return QUERY_ROW_BUDGET
+
+
+def get_sales_with_rls(db, user_role: str, user_id: int, columns=SALES_COLUMNS,
+                       over_budget: str = "downgrade") -> pd.DataFrame:
+    with admit_heavy("sales_frame", user_role):
+        limit = _sales_row_limit(db, user_role, user_id, over_budget=over_budget)
+        query, params = _sales_query(user_role, user_id, columns, limit=limit)
+        with cancellable(db, "sales_frame"):
+            return compact_sales_frame(db.execute(query, params).df())
+
+
+def get_sales_arrow_with_rls(db, user_role: str, user_id: int, columns=SALES_COLUMNS, regions=None,
+                             sort_column: str = "date", ascending: bool = False,
+                             over_budget: str = "downgrade") -> pa.Table:
+    """Sales rows as an Arrow table, for consumers that don't need pandas"""
+    with admit_heavy("sales_arrow", user_role):
+        limit = _sales_row_limit(db, user_role, user_id, regions, over_budget, sort_column, ascending)
+        query, params = _sales_query(user_role, user_id, columns, regions, sort_column, ascending, limit)
+        with cancellable(db, "sales_arrow"):
+            result = db.execute(query, params).arrow()
+            # DuckDB >= 1.4 returns a RecordBatchReader here, older releases a Table
+            return result.read_all() if isinstance(result, pa.RecordBatchReader) else result
+
+
+def get_sales_regions_with_rls(db, user_role: str, user_id: int) -> list:
+    where, params = _sales_rls_filter(user_role, user_id)
+    query = f"SELECT DISTINCT s.region FROM sales_all s WHERE {where} ORDER BY 1"
+    return [row[0] for row in db.execute(query, params).fetchall()]
+
+
+def get_sales_trend_with_rls(db, user_role: str, user_id: int, granularity: str = "day",
+                             date_from=None, date_to=None) -> pd.DataFrame:
+    if granularity not in ("day", "week", "month"):
+        raise ValueError(f"Unsupported granularity: {granularity}")
+    
+    where, params = _sales_rls_filter(user_role, user_id)
+    range_where, range_params = _date_range_filter(date_from, date_to)
+    where = f"{where} AND {range_where}"
+    params = params + range_params
+    
+    query = f"""
+    SELECT
+        CAST(date_trunc('{granularity}', s.date) AS DATE) AS date,
+        SUM(s.total_amount) AS total_amount,
+        SUM(s.quantity) AS quantity
+    FROM sales_all s
+    WHERE {where}
+    GROUP BY 1
+    ORDER BY 1
+    """
+    with cancellable(db, "sales_trend"):
+        return db.execute(query, params).df()
+
+
+def bulk_insert_sales(db, data) -> int:
+    """
+    Append a batch of sales rows (DataFrame or Arrow table) in one statement.
+    Product names are resolved to product ids with a single join, registering
+    unknown names first. Rows are written sorted by (date, user_id) so each
+    new row group covers a narrow date range, and ids continue from the
+    current maximum.
+    """
+    db.register("incoming_sales", data)
+    try:
+        return insert_sales_from(db, "incoming_sales")
+    finally:
+        db.unregister("incoming_sales")
+
+
+def insert_sales_from(db, relation: str) -> int:
+    """
+    Append the rows of relation (a table, view or registered frame with the
+    import columns) to sales with one INSERT ... SELECT; see bulk_insert_sales.
+    """
+    add_missing_products(
+        db,
+        "SELECT CAST(product_name AS VARCHAR) AS name, MAX(CAST(unit_price AS DECIMAL(10, 2))) AS price "
+        f"FROM {relation} GROUP BY 1"
+    )
+    return db.execute(f"""
+        INSERT INTO sales (id, date, user_id, product_id, quantity, unit_price, total_amount, region)
+        SELECT
+            (SELECT COALESCE(MAX(id), 0) FROM sales_all) + row_number() OVER (ORDER BY i.date, i.user_id),
+            i.date, i.user_id, p.id, i.quantity, i.unit_price, i.total_amount, i.region
+        FROM (
+            SELECT
+                CAST(date AS DATE) AS date,
+                CAST(user_id AS INTEGER) AS user_id,
+                CAST(product_name AS VARCHAR) AS product_name,
+                CAST(quantity AS INTEGER) AS quantity,
+                CAST(unit_price AS DECIMAL(10, 2)) AS unit_price,
+                CAST(total_amount AS DECIMAL(10, 2)) AS total_amount,
+                CAST(region AS VARCHAR) AS region
+            FROM {relation}
+        ) i
+        JOIN products p ON p.name = i.product_name
+        ORDER BY i.date, i.user_id
+    """).fetchone()[0]
+
+
+def append_staging_rows(db, table_name: str, data) -> int:
+    """
+    Append raw connector records to a staging table, created from the first
+    batch's columns. Columns that are empty in every batch so far are typed
+    VARCHAR, and fields first seen in a later batch are added to the table.
+    """
+    db.register("incoming_staging", data)
+    try:
+        incoming = db.execute("DESCRIBE incoming_staging").fetchall()
+        filled = db.execute(
+            "SELECT " + ", ".join(f'COUNT("{column[0]}")' for column in incoming) + " FROM incoming_staging"
+        ).fetchone()
+        types = {
+            name: data_type if count and data_type != "NULL" else "VARCHAR"
+            for (name, data_type, *_), count in zip(incoming, filled)
+        }
+        
+        existing = {row[0] for row in db.execute(
+            "SELECT column_name FROM duckdb_columns() WHERE table_name = ?", [table_name]
+        ).fetchall()}
+        if not existing:
+            columns = ", ".join(f'"{name}" {data_type}' for name, data_type in types.items())
+            db.execute(f"CREATE TABLE IF NOT EXISTS {table_name} ({columns})")
+        else:
+            for name, data_type in types.items():
+                if name not in existing:
+                    db.execute(f'ALTER TABLE {table_name} ADD COLUMN "{name}" {data_type}')
+        
+        return db.execute(f"INSERT INTO {table_name} BY NAME SELECT * FROM incoming_staging").fetchone()[0]
+    finally:
+        db.unregister("incoming_staging")
 
 
 def get_all_users(db) -> pd.DataFrame:
@@ -240,24 +696,232 @@ def get_products(db) -> pd.DataFrame:
     return db.execute(query).df()
 
 
-def add_audit_log(db, user_id: int, action: str, table_name: str, record_id: int, old_values: str = None, new_values: str = None):
+def insert_audit_events(db, events) -> int:
+    """
+    Append a batch of audit events (DataFrame or Arrow table with user_id, action,
+    table_name, record_id, old_values, new_values, created_at) in one statement.
+    """
+    db.register("incoming_audit", events)
     try:
-        db.execute(
-            """INSERT INTO audit_log (user_id, action, table_name, record_id, old_values, new_values) 
-            VALUES (?, ?, ?, ?, ?, ?)""",
-            [user_id, action, table_name, record_id, old_values, new_values]
-        )
-        db.commit()
-    except Exception as e:
-        st.warning(f"Error adding audit log: {str(e)}")
+        return db.execute("""
+            INSERT INTO audit_log (id, user_id, action, table_name, record_id, old_values, new_values, created_at)
+            SELECT
+                (SELECT COALESCE(MAX(id), 0) FROM audit_log_all) + row_number() OVER (ORDER BY created_at),
+                CAST(user_id AS INTEGER),
+                CAST(action AS VARCHAR),
+                CAST(table_name AS VARCHAR),
+                CAST(record_id AS INTEGER),
+                CAST(old_values AS VARCHAR),
+                CAST(new_values AS VARCHAR),
+                CAST(created_at AS TIMESTAMP)
+            FROM incoming_audit
+            ORDER BY created_at
+        """).fetchone()[0]
+    finally:
+        db.unregister("incoming_audit")
+
+
+def get_audit_logs(db, user_ids=None, actions=None, table_names=None, created_from=None, created_to=None,
+                   cursor=None, page_size: int = 50):
+    """
+    One page of audit entries, newest first, keyset-paginated on (created_at, id).
+    
+    Args:
+        cursor: (created_at, id) of the last row of the previous page, or None for the first page
+    
+    Returns:
+        tuple: (DataFrame of at most page_size rows, cursor for the next page or None)
+    """
+    where, params = [], []
+    
+    for column, values in (("user_id", user_ids), ("action", actions), ("table_name", table_names)):
+        if values:
+            where.append(f"list_contains(?, al.{column})")
+            params.append(list(values))
+    
+    if created_from is not None:
+        range_where, range_params = _date_range_filter(created_from, alias="al", column="created_at")
+        where.append(range_where)
+        params += range_params
+    
+    if created_to is not None:
+        range_where, range_params = _date_range_filter(date_to=created_to, alias="al", column="created_at")
+        where.append(f"{range_where} AND al.created_at < ?")
+        params += range_params + [created_to]
+    
+    if cursor is not None:
+        # Plain upper bound first so the scan can skip row groups and partitions
+        range_where, range_params = _date_range_filter(date_to=cursor[0], alias="al", column="created_at")
+        where.append(f"{range_where} AND (al.created_at < ? OR al.id < ?)")
+        params += range_params + [cursor[0], cursor[1]]
+    
+    query = f"""
+    SELECT page.id, u.username, page.action, page.table_name, page.record_id, page.created_at
+    FROM (
+        SELECT al.id, al.user_id, al.action, al.table_name, al.record_id, al.created_at
+        FROM audit_log_all al
+        WHERE {" AND ".join(where) or "TRUE"}
+        ORDER BY al.created_at DESC, al.id DESC
+        LIMIT ?
+    ) page
+    LEFT JOIN users u ON page.user_id = u.id
+    ORDER BY page.created_at DESC, page.id DESC
+    """
+    df = db.execute(query, params + [page_size + 1]).df()
+    
+    if len(df) <= page_size:
+        return df, None
+    
+    df = df.head(page_size)
+    last = df.iloc[-1]
+    return df, (last["created_at"].to_pydatetime(), int(last["id"]))
+
 
+def get_audit_filter_options(db) -> dict:
+    return {
+        "actions": [row[0] for row in db.execute("SELECT DISTINCT action FROM audit_log_all ORDER BY 1").fetchall()],
+        "table_names": [row[0] for row in db.execute("SELECT DISTINCT table_name FROM audit_log_all ORDER BY 1").fetchall()]
+    }
 
-def get_audit_logs(db) -> pd.DataFrame:
-    query = """
-    SELECT al.id, u.username, al.action, al.table_name, al.record_id, al.created_at
-    FROM audit_log al
-    JOIN users u ON al.user_id = u.id
-    ORDER BY al.created_at DESC
-    LIMIT 100
+
+
+# ============= SALES CUBE =============
+
+# Dimension name -> expression over sales_all s joined to products p
+CUBE_DIMENSIONS = {
+    "month": "CAST(date_trunc('month', s.date) AS DATE)",
+    "region": "s.region",
+    "category": "COALESCE(p.category, 'Uncategorized')",
+    "user_id": "s.user_id",
+}
+
+
+def _cube_source(where: str, cube: bool = True) -> str:
+    # Group on the expressions: sales_all has its own month column, which an alias would bind to
+    expressions = ", ".join(CUBE_DIMENSIONS.values())
+    dimensions = ", ".join(f"{expr} AS {name}" for name, expr in CUBE_DIMENSIONS.items())
+    return f"""
+    SELECT
+        {dimensions},
+        GROUPING({expressions}) AS grouping_id,
+        CAST(SUM(s.quantity) AS BIGINT) AS quantity,
+        CAST(SUM(s.total_amount) AS DECIMAL(18, 2)) AS total_amount,
+        COUNT(*) AS transactions
+    FROM sales_all s
+    LEFT JOIN products p ON p.id = s.product_id
+    WHERE {where}
+    GROUP BY {f"CUBE ({expressions})" if cube else expressions}
+    """
+
+
+def refresh_sales_cube(db, full: bool = False) -> dict:
+    """
+    Fold sales added since the last refresh into sales_cube.
+    
+    The cube holds every grouping set of (month, region, category, user_id).
+    Sales are append-only with increasing ids, so a refresh aggregates only
+    the rows past the stored watermark and adds them to the existing cells;
+    full=True rebuilds from scratch (e.g. after products are recategorised).
+    """
+    start = time.perf_counter()
+    cells = "month, region, category, user_id, grouping_id"
+    
+    db.execute("BEGIN TRANSACTION")
+    try:
+        watermark = 0
+        if not full:
+            row = db.execute(
+                "SELECT last_sale_id FROM cube_refresh_state WHERE cube_name = 'sales_cube'"
+            ).fetchone()
+            watermark = row[0] if row else 0
+        
+        last_sale_id = db.execute("SELECT COALESCE(MAX(id), 0) FROM sales_all").fetchone()[0]
+        
+        if last_sale_id > watermark or full:
+            existing = "SELECT * FROM sales_cube" if watermark else "SELECT * FROM sales_cube WHERE FALSE"
+            # Grouping on grouping_id keeps rollup NULLs apart from real NULL values
+            db.execute(f"""
+                CREATE OR REPLACE TABLE sales_cube AS
+                SELECT {cells},
+                       CAST(SUM(quantity) AS BIGINT) AS quantity,
+                       CAST(SUM(total_amount) AS DECIMAL(18, 2)) AS total_amount,
+                       CAST(SUM(transactions) AS BIGINT) AS transactions
+                FROM (
+                    {existing}
+                    UNION ALL BY NAME
+                    {_cube_source("s.id > ? AND s.id <= ?")}
+                )
+                GROUP BY {cells}
+                ORDER BY grouping_id, month
+            """, [watermark, last_sale_id])
+            
+            db.execute("""
+                INSERT OR REPLACE INTO cube_refresh_state (cube_name, last_sale_id, refreshed_at)
+                VALUES ('sales_cube', ?, CURRENT_TIMESTAMP)
+            """, [last_sale_id])
+        # Without new sales the transaction stays read-only, so idle refreshes cannot conflict
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+    
+    seconds = time.perf_counter() - start
+    metrics.observe("sales_cube.refresh", seconds)
+    
+    return {"sales": last_sale_id - watermark, "seconds": seconds}
+
+
+def get_cube_slice(db, user_role: str, user_id: int, dimensions=(), filters: dict = None) -> pd.DataFrame:
+    """
+    Quantity, revenue and transaction count grouped by any combination of
+    CUBE_DIMENSIONS, optionally filtered by {dimension: value or list of values}.
+    
+    Admins and users read the precomputed cube (users through its user_id
+    cells). The manager's rolling 90-day window does not line up with months,
+    so managers are aggregated live from sales_all with the same shape.
+    """
+    filters = dict(filters or {})
+    unknown = (set(dimensions) | set(filters)) - set(CUBE_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unsupported cube dimensions: {', '.join(sorted(unknown))}")
+    
+    if user_role not in ("admin", "manager"):
+        filters["user_id"] = user_id
+    
+    select_list = ", ".join(list(dimensions) + [
+        "CAST(SUM(quantity) AS BIGINT) AS quantity",
+        "SUM(total_amount) AS total_amount",
+        "CAST(SUM(transactions) AS BIGINT) AS transactions"
+    ])
+    order_by = f"ORDER BY {', '.join(dimensions)}" if dimensions else ""
+    
+    where, params = [], []
+    for name, value in filters.items():
+        where.append(f"list_contains(?, {name})")
+        params.append(list(value) if isinstance(value, (list, tuple, set)) else [value])
+    
+    if user_role == "manager":
+        rls_where, rls_params = _sales_rls_filter(user_role, user_id)
+        source = _cube_source(rls_where, cube=False)
+        params = rls_params + params
+    else:
+        # Pick the one grouping set that keeps every dimension we group or filter on
+        needed = set(dimensions) | set(filters)
+        grouping_id = sum(
+            1 << (len(CUBE_DIMENSIONS) - 1 - position)
+            for position, name in enumerate(CUBE_DIMENSIONS)
+            if name not in needed
+        )
+        source = "SELECT * FROM sales_cube"
+        where.append("grouping_id = ?")
+        params.append(grouping_id)
+    
+    query = f"""
+    SELECT {select_list}
+    FROM ({source})
+    WHERE {" AND ".join(where) or "TRUE"}
+    GROUP BY ALL
+    {order_by}
     """
-    return db.execute(query).df()
\ No newline at end of file
+    with cancellable(db, "sales_cube"):
+        return db.execute(query, params).df()
@@ -0,0 +1,48 @@
+"""
+Export utilities
+Serialise Arrow tables and record batch streams for downloads
+"""
+
+import io
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+
+def _batches(data):
+    """Yield record batches from a Table or RecordBatchReader"""
+    if isinstance(data, pa.RecordBatchReader):
+        yield from data
+    else:
+        yield from data.to_batches()
+
+
+def to_csv_bytes(data) -> bytes:
+    """Write a Table or RecordBatchReader as CSV"""
+    sink = io.BytesIO()
+    writer = pa_csv.CSVWriter(sink, data.schema)
+    
+    for batch in _batches(data):
+        writer.write_batch(batch)
+    
+    writer.close()
+    return sink.getvalue()
+
+
+def to_parquet_bytes(data, compression: str = "zstd") -> bytes:
+    """Write a Table or RecordBatchReader as a single Parquet file"""
+    sink = io.BytesIO()
+    writer = pq.ParquetWriter(sink, data.schema, compression=compression)
+    
+    for batch in _batches(data):
+        writer.write_batch(batch)
+    
+    writer.close()
+    return sink.getvalue()
+
+
+def to_excel_bytes(table: pa.Table) -> bytes:
+    """Excel has no Arrow writer, so this is the one export that goes through pandas"""
+    sink = io.BytesIO()
+    table.to_pandas().to_excel(sink, index=False, engine="openpyxl")
+    return sink.getvalue()
@@ -0,0 +1,297 @@
+"""
+Database maintenance
+Physical layout and storage housekeeping for the DuckDB file
+"""
+
+import os
+import shutil
+import time
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+import duckdb
+import pandas as pd
+from src.config import AUDIT_RETENTION_DAYS, COLD_STORAGE_DIR, DUCKDB_SETTINGS
+from src.db import (
+    AUDIT_COLUMNS, DB_PATH, HOT_SALES_QUERY, SALES_VIEW_COLUMNS, refresh_audit_view, refresh_sales_view
+)
+
+
+def _rename_table_ddl(db, table_name: str, new_name: str) -> str:
+    """CREATE TABLE statement for table_name, including constraints, under a new name"""
+    ddl = db.execute(
+        "SELECT sql FROM duckdb_tables() WHERE table_name = ?", [table_name]
+    ).fetchone()[0]
+    return ddl.replace(f"CREATE TABLE {table_name}(", f"CREATE TABLE {new_name}(", 1)
+
+
+def _checkpoint(db):
+    try:
+        db.execute("CHECKPOINT")
+    except Exception:
+        # Another connection has an open write transaction; the next automatic checkpoint will catch up
+        pass
+
+
+def zone_map_pruning(db, table_name: str, column: str, low=None, high=None) -> dict:
+    """
+    Count the row groups whose min/max statistics for column fall entirely
+    outside [low, high], i.e. the ones a scan with that predicate can skip.
+    """
+    data_type = db.execute(
+        "SELECT data_type FROM duckdb_columns() WHERE table_name = ? AND column_name = ?",
+        [table_name, column]
+    ).fetchone()[0]
+    
+    total, skipped = db.execute(f"""
+        WITH ranges AS (
+            SELECT
+                row_group_id,
+                MIN(TRY_CAST(regexp_extract(stats, 'Min: ([^,]+),', 1) AS {data_type})) AS min_value,
+                MAX(TRY_CAST(regexp_extract(stats, 'Max: ([^\\]]+)\\]', 1) AS {data_type})) AS max_value
+            FROM pragma_storage_info('{table_name}')
+            WHERE column_name = ? AND segment_type <> 'VALIDITY'
+            GROUP BY row_group_id
+        )
+        SELECT
+            COUNT(*),
+            COUNT(*) FILTER (WHERE (CAST(? AS {data_type}) IS NOT NULL AND max_value < CAST(? AS {data_type}))
+                              OR (CAST(? AS {data_type}) IS NOT NULL AND min_value > CAST(? AS {data_type})))
+        FROM ranges
+    """, [column, low, low, high, high]).fetchone()
+    
+    return {"row_groups": total, "skipped": skipped}
+
+
+def cluster_table(db, table_name: str, order_by: str) -> dict:
+    """
+    Rewrite table_name sorted by order_by so range predicates and top-N scans
+    on those columns can skip row groups via their zone maps.
+    Relies on preserve_insertion_order (on by default) to keep the sort.
+    """
+    start = time.perf_counter()
+    clustered = f"{table_name}_clustered"
+    
+    db.execute("BEGIN TRANSACTION")
+    try:
+        db.execute(_rename_table_ddl(db, table_name, clustered))
+        rows = db.execute(
+            f"INSERT INTO {clustered} SELECT * FROM {table_name} ORDER BY {order_by}"
+        ).fetchone()[0]
+        db.execute(f"DROP TABLE {table_name}")
+        db.execute(f"ALTER TABLE {clustered} RENAME TO {table_name}")
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+    
+    _checkpoint(db)
+    
+    return {"rows": rows, "seconds": time.perf_counter() - start}
+
+
+def cluster_sales(db) -> dict:
+    """Order sales by (date, user_id) so the manager's 90-day window skips old row groups"""
+    return cluster_table(db, "sales", "date, user_id")
+
+
+def cluster_audit_log(db) -> dict:
+    """Order audit_log by (created_at, id) so keyset pages are served from a few row groups"""
+    return cluster_table(db, "audit_log", "created_at, id")
+
+
+def _tier_closed_months(db, table_name: str, query: str, date_column: str, order_by: str, cold_dir: str) -> dict:
+    """
+    Move rows of table_name dated before the first of the current month into
+    year/month-partitioned Parquet under cold_dir/table_name. query selects
+    the archived columns plus year and month from the hot table.
+    """
+    start = time.perf_counter()
+    cutoff = date.today().replace(day=1)
+    target = Path(cold_dir) / table_name
+    target.mkdir(parents=True, exist_ok=True)
+    batch = uuid.uuid4().hex[:8]
+    
+    db.execute("BEGIN TRANSACTION")
+    try:
+        rows = db.execute(f"""
+            COPY (
+                SELECT * FROM ({query})
+                WHERE {date_column} < ?
+                ORDER BY {order_by}
+            ) TO '{target.as_posix()}' (
+                FORMAT PARQUET, COMPRESSION ZSTD, PARTITION_BY (year, month),
+                FILENAME_PATTERN '{table_name}_{batch}_{{uuid}}', APPEND
+            )
+        """, [cutoff]).fetchone()[0]
+        db.execute(f"DELETE FROM {table_name} WHERE {date_column} < ?", [cutoff])
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        # The rows are still in the hot table, so drop this batch's files to avoid double counting
+        for path in target.glob(f"*/*/{table_name}_{batch}_*.parquet"):
+            path.unlink()
+        raise
+    
+    partitions = sorted({path.parent.relative_to(target).as_posix()
+                         for path in target.glob(f"*/*/{table_name}_{batch}_*.parquet")})
+    
+    return {"rows": rows, "partitions": partitions, "seconds": time.perf_counter() - start}
+
+
+def tier_closed_months(db, cold_dir: str = COLD_STORAGE_DIR) -> dict:
+    """
+    Move sales from closed months out of the DuckDB file into Parquet under
+    cold_dir/sales, then repoint the sales_all view at the new files. Reads
+    through sales_all are unaffected; writes keep going to the hot sales table.
+    """
+    result = _tier_closed_months(
+        db, "sales",
+        f"SELECT {SALES_VIEW_COLUMNS}, year, month FROM ({HOT_SALES_QUERY})",
+        "date", "date, user_id", cold_dir
+    )
+    refresh_sales_view(db)
+    _checkpoint(db)
+    return result
+
+
+def tier_audit_log(db, cold_dir: str = COLD_STORAGE_DIR) -> dict:
+    """Move closed months of audit_log to Parquet under cold_dir/audit_log"""
+    result = _tier_closed_months(
+        db, "audit_log",
+        f"SELECT {AUDIT_COLUMNS}, year(created_at) AS year, month(created_at) AS month FROM audit_log",
+        "created_at", "created_at, id", cold_dir
+    )
+    refresh_audit_view(db)
+    _checkpoint(db)
+    return result
+
+
+def apply_audit_retention(db, days: int = AUDIT_RETENTION_DAYS, cold_dir: str = COLD_STORAGE_DIR) -> dict:
+    """
+    Drop audit history older than days by deleting whole monthly partitions.
+    
+    Closed months are tiered out of the table first, so expiry is a directory
+    delete rather than a DELETE that rewrites and bloats audit_log. A month
+    is dropped once all of it is past the cutoff, so up to a month more than
+    days may be kept.
+    """
+    start = time.perf_counter()
+    tiered = tier_audit_log(db, cold_dir)
+    cutoff = date.today() - timedelta(days=days)
+    
+    dropped, reclaimed = [], 0
+    for partition in sorted((Path(cold_dir) / "audit_log").glob("year=*/month=*")):
+        year = int(partition.parent.name.split("=")[1])
+        month = int(partition.name.split("=")[1])
+        month_end = date(year + month // 12, month % 12 + 1, 1)
+        if month_end > cutoff:
+            continue
+        
+        reclaimed += sum(path.stat().st_size for path in partition.glob("*.parquet"))
+        shutil.rmtree(partition)
+        dropped.append(f"year={year}/month={month}")
+    
+    for year_dir in (Path(cold_dir) / "audit_log").glob("year=*"):
+        if not any(year_dir.iterdir()):
+            year_dir.rmdir()
+    
+    refresh_audit_view(db)
+    
+    return {
+        "tiered_rows": tiered["rows"],
+        "dropped": dropped,
+        "bytes_reclaimed": reclaimed,
+        "seconds": time.perf_counter() - start
+    }
+
+
+# ============= FILE SIZE & COMPACTION =============
+
+def database_files(db_path: str = DB_PATH) -> dict:
+    """Size in bytes of the database file and its write-ahead log"""
+    wal_path = Path(f"{db_path}.wal")
+    return {
+        "db_bytes": Path(db_path).stat().st_size if Path(db_path).exists() else 0,
+        "wal_bytes": wal_path.stat().st_size if wal_path.exists() else 0
+    }
+
+
+def storage_stats(db) -> pd.DataFrame:
+    """Rows, row groups and approximate on-disk size of every table"""
+    block_size = db.execute("SELECT block_size FROM pragma_database_size()").fetchone()[0]
+    tables = db.execute(
+        "SELECT table_name FROM duckdb_tables() WHERE NOT temporary ORDER BY table_name"
+    ).fetchall()
+    
+    stats = []
+    for (table_name,) in tables:
+        # estimated_size still counts deleted rows until the row groups are rewritten
+        rows = db.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+        row_groups, blocks = db.execute(f"""
+            SELECT COUNT(DISTINCT row_group_id), COUNT(DISTINCT block_id) FILTER (WHERE persistent)
+            FROM pragma_storage_info('{table_name}')
+        """).fetchone()
+        stats.append({
+            "table": table_name,
+            "rows": rows,
+            "row_groups": row_groups,
+            "avg_rows_per_group": rows // row_groups if row_groups else 0,
+            "approx_mb": blocks * block_size / 1024 / 1024
+        })
+    
+    return pd.DataFrame(stats)
+
+
+def checkpoint(db, db_path: str = DB_PATH, force: bool = False) -> dict:
+    """
+    Flush the WAL into the database file and release free blocks at its end.
+    A plain checkpoint is skipped while other connections have transactions
+    open; force=True aborts those transactions instead, so only use it when
+    nothing else is writing (the data_sync.py checkpoint command).
+    """
+    before = database_files(db_path)
+    start = time.perf_counter()
+    db.execute("FORCE CHECKPOINT" if force else "CHECKPOINT")
+    return {"before": before, "after": database_files(db_path), "seconds": time.perf_counter() - start}
+
+
+def compact_database(db_path: str = DB_PATH) -> dict:
+    """
+    Copy every table, view and sequence into a fresh file and swap it in,
+    dropping the free blocks that deletes and reloads leave behind.
+    
+    The swap replaces the file on disk, so no other connection may have the
+    database open: connections in the same process would keep writing to the
+    old, deleted file. Run it from the CLI (data_sync.py compact) while the
+    dashboard and scheduler are stopped.
+    """
+    path = Path(db_path)
+    compacted = path.with_name(f"{path.stem}.compact{path.suffix}")
+    previous = path.with_name(f"{path.stem}.pre-compact{path.suffix}")
+    compacted.unlink(missing_ok=True)
+    
+    before = database_files(db_path)
+    start = time.perf_counter()
+    
+    db = duckdb.connect(db_path, config=DUCKDB_SETTINGS)
+    try:
+        db.execute("CHECKPOINT")
+        name = db.execute("SELECT current_database()").fetchone()[0]
+        db.execute(f"ATTACH '{compacted.as_posix()}' AS compacted")
+        try:
+            db.execute(f"COPY FROM DATABASE {name} TO compacted")
+        finally:
+            db.execute("DETACH compacted")
+    except Exception:
+        compacted.unlink(missing_ok=True)
+        raise
+    finally:
+        db.close()
+    
+    os.replace(path, previous)
+    os.replace(compacted, path)
+    previous.unlink()
+    Path(f"{previous}.wal").unlink(missing_ok=True)
+    
+    return {"before": before, "after": database_files(db_path), "seconds": time.perf_counter() - start}
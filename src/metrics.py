@@ -0,0 +1,40 @@
+"""
+In-process metrics
+Counters and timings shared by every session of this server process
+"""
+
+import threading
+
+
+_lock = threading.Lock()
+_counters = {}
+_timings = {}
+
+
+def increment(name: str, value: int = 1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def observe(name: str, seconds: float):
+    """Record one duration sample under name"""
+    with _lock:
+        timing = _timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+        timing["count"] += 1
+        timing["total"] += seconds
+        timing["max"] = max(timing["max"], seconds)
+
+
+def snapshot() -> dict:
+    """
+    Copy of all metrics.
+    
+    Returns:
+        dict: {"counters": {name: value}, "timings": {name: {count, total, max, avg}}}
+    """
+    with _lock:
+        timings = {
+            name: {**timing, "avg": timing["total"] / timing["count"] if timing["count"] else 0.0}
+            for name, timing in _timings.items()
+        }
+        return {"counters": dict(_counters), "timings": timings}
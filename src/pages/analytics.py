@@ -2,7 +2,11 @@ import streamlit as st
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
-from src.db import get_db, get_sales_with_rls
+from src.db import (
+    get_db, get_sales_with_rls, get_cube_slice, get_sales_trend_with_rls, get_data_version, rls_scope
+)
+from src.admission import QueryRejected
+from src.charts import choose_granularity, downsample_trend, cached_figure
 
 
 def render_analytics():
@@ -12,7 +16,14 @@ def render_analytics():
     
     try:
         user_id = get_user_id(db, st.session_state.username)
-        sales_df = get_sales_with_rls(db, st.session_state.user_role, user_id)
+        try:
+            sales_df = get_sales_with_rls(
+                db, st.session_state.user_role, user_id,
+                columns=("date", "product_name", "quantity", "total_amount", "region")
+            )
+        except QueryRejected as e:
+            st.error(str(e))
+            return
         
         if sales_df.empty:
             st.info("No sales data available for your role")
@@ -38,112 +49,47 @@ def render_analytics():
         
         st.markdown("<div style='margin-top: 2rem;'></div>", unsafe_allow_html=True)
         
+        user_role = st.session_state.user_role
+        scope = rls_scope(user_role, user_id)
+        data_version = get_data_version(db)
+        
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("<h3 style='margin-bottom: 1rem;'>Sales by Region</h3>", unsafe_allow_html=True)
-            region_data = sales_df.groupby("region")["total_amount"].sum().sort_values(ascending=False)
-            
-            fig_region = go.Figure(data=[
-                go.Bar(
-                    x=region_data.index,
-                    y=region_data.values,
-                    marker=dict(color="#1F77B4"),
-                    text=[f"${val:,.0f}" for val in region_data.values],
-                    textposition="outside"
-                )
-            ])
-            
-            fig_region.update_layout(
-                xaxis_title="Region",
-                yaxis_title="Sales Amount",
-                template="plotly_dark",
-                paper_bgcolor="#161B22",
-                plot_bgcolor="#161B22",
-                font=dict(color="#E0E0E0"),
-                showlegend=False,
-                height=400
+            fig_region = cached_figure(
+                "analytics_region", scope, (), data_version,
+                lambda: build_region_figure(sales_df)
             )
-            
             st.plotly_chart(fig_region, use_container_width=True)
         
         with col2:
             st.markdown("<h3 style='margin-bottom: 1rem;'>Top Products</h3>", unsafe_allow_html=True)
-            product_data = sales_df.groupby("product_name")["quantity"].sum().sort_values(ascending=False).head(8)
-            
-            fig_products = go.Figure(data=[
-                go.Bar(
-                    y=product_data.index,
-                    x=product_data.values,
-                    orientation="h",
-                    marker=dict(color="#1F77B4"),
-                    text=[f"{val:,}" for val in product_data.values],
-                    textposition="outside"
-                )
-            ])
-            
-            fig_products.update_layout(
-                xaxis_title="Units Sold",
-                yaxis_title="Product",
-                template="plotly_dark",
-                paper_bgcolor="#161B22",
-                plot_bgcolor="#161B22",
-                font=dict(color="#E0E0E0"),
-                showlegend=False,
-                height=400
+            fig_products = cached_figure(
+                "analytics_products", scope, (), data_version,
+                lambda: build_products_figure(sales_df)
             )
-            
             st.plotly_chart(fig_products, use_container_width=True)
         
         st.markdown("<div style='margin-top: 2rem;'></div>", unsafe_allow_html=True)
         
         st.markdown("<h3 style='margin-bottom: 1rem;'>Sales Trend</h3>", unsafe_allow_html=True)
         
-        daily_sales = sales_df.groupby("date")["total_amount"].sum().reset_index().sort_values("date")
-        
-        fig_trend = go.Figure(data=[
-            go.Scatter(
-                x=daily_sales["date"],
-                y=daily_sales["total_amount"],
-                mode="lines+markers",
-                line=dict(color="#1F77B4", width=2),
-                marker=dict(size=6),
-                fill="tozeroy",
-                fillcolor="rgba(31, 119, 180, 0.2)"
+        granularity = choose_granularity(sales_df["date"].min(), sales_df["date"].max())
+        fig_trend = cached_figure(
+            "analytics_trend", scope, (granularity,), data_version,
+            lambda: build_trend_figure(
+                get_sales_trend_with_rls(db, user_role, user_id, granularity)
             )
-        ])
-        
-        fig_trend.update_layout(
-            xaxis_title="Date",
-            yaxis_title="Sales Amount",
-            template="plotly_dark",
-            paper_bgcolor="#161B22",
-            plot_bgcolor="#161B22",
-            font=dict(color="#E0E0E0"),
-            showlegend=False,
-            height=400
         )
-        
         st.plotly_chart(fig_trend, use_container_width=True)
+        st.caption(f"Aggregated by {granularity}")
         
         st.markdown("<h3 style='margin-bottom: 1rem; margin-top: 2rem;'>Sales by Product Category</h3>", unsafe_allow_html=True)
         
-        category_data = sales_df.groupby("product_name")["quantity"].sum().head(12)
-        
-        colors = ["#1F77B4", "#FF7F0E", "#2CA02C", "#D62728", "#9467BD", "#8C564B"]
-        fig_pie = go.Figure(data=[
-            go.Pie(
-                labels=category_data.index,
-                values=category_data.values,
-                marker=dict(colors=colors * 2)
-            )
-        ])
-        
-        fig_pie.update_layout(
-            template="plotly_dark",
-            paper_bgcolor="#161B22",
-            font=dict(color="#E0E0E0"),
-            height=400
+        fig_pie = cached_figure(
+            "analytics_category", scope, (), data_version,
+            lambda: build_category_figure(get_cube_slice(db, user_role, user_id, ("category",)))
         )
         
         col1, col2 = st.columns([1.2, 0.8])
@@ -161,11 +107,123 @@ def render_analytics():
                 <p style='color: #8B949E; margin: 0.5rem 0;'>Min Transaction: <span style='color: #58A6FF; font-weight: bold;'>${sales_df['total_amount'].min():,.2f}</span></p>
             </div>
             """, unsafe_allow_html=True)
+        
+        st.markdown("<h3 style='margin-bottom: 1rem; margin-top: 2rem;'>Cross-Dimension Breakdown</h3>", unsafe_allow_html=True)
+        
+        options = ["month", "region", "category"] + (["user_id"] if user_role == "admin" else [])
+        dimensions = st.multiselect("Break down by", options, default=["region", "category"])
+        
+        breakdown = get_cube_slice(db, user_role, user_id, dimensions)
+        st.dataframe(breakdown, use_container_width=True, hide_index=True)
     
     finally:
         db.close()
 
 
+def build_region_figure(sales_df: pd.DataFrame) -> go.Figure:
+    region_data = sales_df.groupby("region", observed=True)["total_amount"].sum().sort_values(ascending=False)
+    
+    fig_region = go.Figure(data=[
+        go.Bar(
+            x=region_data.index,
+            y=region_data.values,
+            marker=dict(color="#1F77B4"),
+            text=[f"${val:,.0f}" for val in region_data.values],
+            textposition="outside"
+        )
+    ])
+    
+    fig_region.update_layout(
+        xaxis_title="Region",
+        yaxis_title="Sales Amount",
+        template="plotly_dark",
+        paper_bgcolor="#161B22",
+        plot_bgcolor="#161B22",
+        font=dict(color="#E0E0E0"),
+        showlegend=False,
+        height=400
+    )
+    
+    return fig_region
+
+
+def build_products_figure(sales_df: pd.DataFrame) -> go.Figure:
+    product_data = sales_df.groupby("product_name", observed=True)["quantity"].sum().sort_values(ascending=False).head(8)
+    
+    fig_products = go.Figure(data=[
+        go.Bar(
+            y=product_data.index,
+            x=product_data.values,
+            orientation="h",
+            marker=dict(color="#1F77B4"),
+            text=[f"{val:,}" for val in product_data.values],
+            textposition="outside"
+        )
+    ])
+    
+    fig_products.update_layout(
+        xaxis_title="Units Sold",
+        yaxis_title="Product",
+        template="plotly_dark",
+        paper_bgcolor="#161B22",
+        plot_bgcolor="#161B22",
+        font=dict(color="#E0E0E0"),
+        showlegend=False,
+        height=400
+    )
+    
+    return fig_products
+
+
+def build_trend_figure(trend_sales: pd.DataFrame) -> go.Figure:
+    trend_sales = downsample_trend(trend_sales, "date", "total_amount")
+    
+    fig_trend = go.Figure(data=[
+        go.Scatter(
+            x=trend_sales["date"],
+            y=trend_sales["total_amount"],
+            mode="lines+markers",
+            line=dict(color="#1F77B4", width=2),
+            marker=dict(size=6),
+            fill="tozeroy",
+            fillcolor="rgba(31, 119, 180, 0.2)"
+        )
+    ])
+    
+    fig_trend.update_layout(
+        xaxis_title="Date",
+        yaxis_title="Sales Amount",
+        template="plotly_dark",
+        paper_bgcolor="#161B22",
+        plot_bgcolor="#161B22",
+        font=dict(color="#E0E0E0"),
+        showlegend=False,
+        height=400
+    )
+    
+    return fig_trend
+
+
+def build_category_figure(category_data: pd.DataFrame) -> go.Figure:
+    colors = ["#1F77B4", "#FF7F0E", "#2CA02C", "#D62728", "#9467BD", "#8C564B"]
+    fig_pie = go.Figure(data=[
+        go.Pie(
+            labels=category_data["category"],
+            values=category_data["quantity"],
+            marker=dict(colors=colors * 2)
+        )
+    ])
+    
+    fig_pie.update_layout(
+        template="plotly_dark",
+        paper_bgcolor="#161B22",
+        font=dict(color="#E0E0E0"),
+        height=400
+    )
+    
+    return fig_pie
+
+
 def get_user_id(db, username: str) -> int:
     result = db.execute("SELECT id FROM users WHERE username = ?", [username]).fetchall()
     return result[0][0] if result else 1
\ No newline at end of file
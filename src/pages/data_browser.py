@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
-from src.db import get_db, get_sales_with_rls, get_products
+import pyarrow.compute as pc
+from src.db import get_db, get_sales_arrow_with_rls, get_sales_regions_with_rls, get_products
+from src.admission import QueryRejected, admit_heavy
+from src.exports import to_csv_bytes
 
 
 def render_data_browser():
@@ -28,22 +31,19 @@ def render_sales_browser(db):
     st.markdown("<h3 style='margin-bottom: 1rem;'>Sales Records</h3>", unsafe_allow_html=True)
     
     user_id = get_user_id(db, st.session_state.username)
-    sales_df = get_sales_with_rls(db, st.session_state.user_role, user_id)
-    
-    if sales_df.empty:
-        st.info("No sales data available")
-        return
+    user_role = st.session_state.user_role
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if st.session_state.user_role != "user":
+        selected_region = None
+        if user_role != "user":
+            region_options = get_sales_regions_with_rls(db, user_role, user_id)
             selected_region = st.multiselect(
                 "Filter by Region",
-                options=sales_df["region"].unique(),
-                default=sales_df["region"].unique().tolist()
+                options=region_options,
+                default=region_options
             )
-            sales_df = sales_df[sales_df["region"].isin(selected_region)]
     
     with col2:
         sort_column = st.selectbox("Sort by", ["date", "total_amount", "quantity"])
@@ -51,7 +51,21 @@ def render_sales_browser(db):
     with col3:
         sort_order = st.selectbox("Order", ["Descending", "Ascending"])
     
-    sales_df = sales_df.sort_values(sort_column, ascending=(sort_order == "Ascending"))
+    try:
+        sales_table = get_sales_arrow_with_rls(
+            db, user_role, user_id,
+            columns=("id", "date", "product_name", "quantity", "unit_price", "total_amount", "region"),
+            regions=selected_region,
+            sort_column=sort_column,
+            ascending=(sort_order == "Ascending")
+        )
+    except QueryRejected as e:
+        st.error(str(e))
+        return
+    
+    if sales_table.num_rows == 0:
+        st.info("No sales data available")
+        return
     
     st.markdown("""
     <style>
@@ -65,7 +79,7 @@ def render_sales_browser(db):
     """, unsafe_allow_html=True)
     
     st.dataframe(
-        sales_df[["id", "date", "product_name", "quantity", "unit_price", "total_amount", "region"]],
+        sales_table,
         use_container_width=True,
         hide_index=True,
         height=400
@@ -74,19 +88,21 @@ def render_sales_browser(db):
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        csv = sales_df.to_csv(index=False)
+        with admit_heavy("export_csv"):
+            csv_data = to_csv_bytes(sales_table)
         st.download_button(
             label="Download CSV",
-            data=csv,
+            data=csv_data,
             file_name="sales_data.csv",
             mime="text/csv"
         )
     
     with col2:
-        st.metric("Total Records", len(sales_df))
+        st.metric("Total Records", sales_table.num_rows)
     
     with col3:
-        st.metric("Total Value", f"${sales_df['total_amount'].sum():,.2f}")
+        total_value = pc.sum(sales_table["total_amount"]).as_py() or 0
+        st.metric("Total Value", f"${total_value:,.2f}")
 
 
 def render_products_browser(db):
@@ -155,11 +171,11 @@ def render_statistics(db):
     col1, col2 = st.columns(2)
     
     with col1:
-        sales_count = db.execute("SELECT COUNT(*) as cnt FROM sales").fetchall()[0][0]
+        sales_count = db.execute("SELECT COUNT(*) as cnt FROM sales_all").fetchall()[0][0]
         st.metric("Total Transactions", sales_count)
     
     with col2:
-        total_sales_value = db.execute("SELECT COALESCE(SUM(total_amount), 0) as total FROM sales").fetchall()[0][0]
+        total_sales_value = db.execute("SELECT COALESCE(SUM(total_amount), 0) as total FROM sales_all").fetchall()[0][0]
         st.metric("Total Sales Value", f"${total_sales_value:,.2f}")
     
     st.markdown("<h4 style='margin-top: 2rem; margin-bottom: 1rem;'>Database Summary</h4>", unsafe_allow_html=True)
@@ -171,7 +187,7 @@ def render_statistics(db):
             db.execute("SELECT COUNT(*) as cnt FROM users WHERE is_active = TRUE").fetchall()[0][0],
             product_count,
             sales_count,
-            db.execute("SELECT COUNT(DISTINCT region) as cnt FROM sales").fetchall()[0][0]
+            db.execute("SELECT COUNT(DISTINCT region) as cnt FROM sales_all").fetchall()[0][0]
         ]
     }
     
@@ -190,9 +190,9 @@ def render_home():
     # Get statistics from database
     db = get_db()
     try:
-        sales_count = db.execute("SELECT COUNT(*) as count FROM sales").fetchall()[0][0]
+        sales_count = db.execute("SELECT COUNT(*) as count FROM sales_all").fetchall()[0][0]
         users_count = db.execute("SELECT COUNT(*) as count FROM users").fetchall()[0][0]
-        audit_count = db.execute("SELECT COUNT(*) as count FROM audit_log").fetchall()[0][0]
+        audit_count = db.execute("SELECT COUNT(*) as count FROM audit_log_all").fetchall()[0][0]
     except:
         sales_count = 0
         users_count = 0
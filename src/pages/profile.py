@@ -1,4 +1,5 @@
 import streamlit as st
+from src.auth import hash_password, verify_password
 from src.db import get_db
 from datetime import datetime
 
@@ -115,19 +116,16 @@ def render_change_password(db, username: str):
                 st.error("New password must be different from current password")
                 return
             
-            import hashlib
-            old_password_hash = hashlib.sha256(old_password.encode()).hexdigest()
-            
             user = db.execute(
-                "SELECT id FROM users WHERE username = ? AND password_hash = ?",
-                [username, old_password_hash]
+                "SELECT password_hash FROM users WHERE username = ?",
+                [username]
             ).fetchall()
             
-            if not user:
+            if not user or not verify_password(old_password, user[0][0]):
                 st.error("Current password is incorrect")
                 return
             
-            new_password_hash = hashlib.sha256(new_password.encode()).hexdigest()
+            new_password_hash = hash_password(new_password)
             
             db.execute(
                 "UPDATE users SET password_hash = ? WHERE username = ?",
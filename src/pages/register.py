@@ -3,16 +3,12 @@ Register Page - Leonardo.Ai inspired clean, modern registration interface
 """
 
 import streamlit as st
-import hashlib
 import re
 from datetime import datetime
+from src.auth import hash_password
 from src.db import get_db, create_user, user_exists
 
 
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
-
-
 def validate_email(email: str) -> bool:
     """Validate email format"""
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
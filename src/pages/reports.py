@@ -2,7 +2,10 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
-from src.db import get_db, get_sales_with_rls
+from src.db import get_db, get_sales_with_rls, get_sales_arrow_with_rls, get_sales_trend_with_rls, get_data_version, rls_scope
+from src.admission import QueryRejected, admit_heavy
+from src.exports import to_csv_bytes, to_parquet_bytes, to_excel_bytes
+from src.charts import choose_granularity, downsample_trend, cached_figure
 
 
 def render_reports():
@@ -30,7 +33,14 @@ def render_sales_report(db):
     st.markdown("<h3 style='margin-bottom: 1rem;'>Sales Performance Report</h3>", unsafe_allow_html=True)
     
     user_id = get_user_id(db, st.session_state.username)
-    sales_df = get_sales_with_rls(db, st.session_state.user_role, user_id)
+    try:
+        sales_df = get_sales_with_rls(
+            db, st.session_state.user_role, user_id,
+            columns=("date", "product_name", "quantity", "unit_price", "total_amount")
+        )
+    except QueryRejected as e:
+        st.error(str(e))
+        return
     
     if sales_df.empty:
         st.info("No sales data available")
@@ -75,18 +85,19 @@ def render_sales_report(db):
     with col4:
         st.metric("Units Sold", int(filtered_sales['quantity'].sum()))
     
-    st.markdown("<h4 style='margin-top: 2rem; margin-bottom: 1rem;'>Daily Sales Trend</h4>", unsafe_allow_html=True)
+    st.markdown("<h4 style='margin-top: 2rem; margin-bottom: 1rem;'>Sales Trend</h4>", unsafe_allow_html=True)
     
-    daily_sales = filtered_sales.groupby("date").agg({
-        "total_amount": "sum",
-        "quantity": "sum"
-    }).reset_index().sort_values("date")
+    granularity = choose_granularity(date_from, date_to)
+    trend_sales = get_sales_trend_with_rls(
+        db, st.session_state.user_role, user_id, granularity, date_from, date_to
+    )
+    trend_sales = downsample_trend(trend_sales, "date", "total_amount")
     
     fig = go.Figure()
     
     fig.add_trace(go.Scatter(
-        x=daily_sales["date"],
-        y=daily_sales["total_amount"],
+        x=trend_sales["date"],
+        y=trend_sales["total_amount"],
         mode="lines+markers",
         name="Sales Amount",
         line=dict(color="#1F77B4", width=2),
@@ -95,8 +106,8 @@ def render_sales_report(db):
     ))
     
     fig.add_trace(go.Bar(
-        x=daily_sales["date"],
-        y=daily_sales["quantity"],
+        x=trend_sales["date"],
+        y=trend_sales["quantity"],
         name="Units Sold",
         marker=dict(color="#FF7F0E"),
         opacity=0.3,
@@ -116,10 +127,11 @@ def render_sales_report(db):
     )
     
     st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"Aggregated by {granularity}")
     
     st.markdown("<h4 style='margin-top: 2rem; margin-bottom: 1rem;'>Top Performing Products</h4>", unsafe_allow_html=True)
     
-    product_performance = filtered_sales.groupby("product_name").agg({
+    product_performance = filtered_sales.groupby("product_name", observed=True).agg({
         "quantity": "sum",
         "total_amount": "sum",
         "unit_price": "first"
@@ -153,19 +165,28 @@ def render_regional_analysis(db):
     st.markdown("<h3 style='margin-bottom: 1rem;'>Regional Analysis</h3>", unsafe_allow_html=True)
     
     user_id = get_user_id(db, st.session_state.username)
-    sales_df = get_sales_with_rls(db, st.session_state.user_role, user_id)
+    try:
+        sales_table = get_sales_arrow_with_rls(
+            db, st.session_state.user_role, user_id,
+            columns=("quantity", "total_amount", "region")
+        )
+    except QueryRejected as e:
+        st.error(str(e))
+        return
     
-    if sales_df.empty:
+    if sales_table.num_rows == 0:
         st.info("No sales data available")
         return
     
-    regional_stats = sales_df.groupby("region").agg({
-        "total_amount": ["sum", "mean", "count"],
-        "quantity": "sum"
-    }).reset_index()
+    regional_stats = sales_table.group_by("region").aggregate([
+        ("total_amount", "sum"),
+        ("total_amount", "mean"),
+        ("total_amount", "count"),
+        ("quantity", "sum")
+    ]).sort_by([("total_amount_sum", "descending")]).to_pandas()
     
     regional_stats.columns = ["Region", "Total Sales", "Avg Sale", "Transactions", "Units Sold"]
-    regional_stats = regional_stats.sort_values("Total Sales", ascending=False)
+    regional_stats[["Total Sales", "Avg Sale"]] = regional_stats[["Total Sales", "Avg Sale"]].astype(float)
     
     st.dataframe(
         regional_stats.assign(**{
@@ -180,6 +201,18 @@ def render_regional_analysis(db):
     
     st.markdown("<h4 style='margin-top: 2rem; margin-bottom: 1rem;'>Market Share by Region</h4>", unsafe_allow_html=True)
     
+    fig_pie = cached_figure(
+        "reports_regional_share",
+        rls_scope(st.session_state.user_role, user_id),
+        (),
+        get_data_version(db),
+        lambda: build_regional_share_figure(regional_stats)
+    )
+    
+    st.plotly_chart(fig_pie, use_container_width=True)
+
+
+def build_regional_share_figure(regional_stats: pd.DataFrame) -> go.Figure:
     fig_pie = go.Figure(data=[
         go.Pie(
             labels=regional_stats["Region"],
@@ -195,23 +228,30 @@ def render_regional_analysis(db):
         height=400
     )
     
-    st.plotly_chart(fig_pie, use_container_width=True)
+    return fig_pie
 
 
 def render_export(db):
     st.markdown("<h3 style='margin-bottom: 1rem;'>Export Data</h3>", unsafe_allow_html=True)
     
     user_id = get_user_id(db, st.session_state.username)
-    sales_df = get_sales_with_rls(db, st.session_state.user_role, user_id)
+    try:
+        sales_table = get_sales_arrow_with_rls(
+            db, st.session_state.user_role, user_id, over_budget="reject"
+        )
+    except QueryRejected as e:
+        st.error(str(e))
+        return
     
-    if sales_df.empty:
+    if sales_table.num_rows == 0:
         st.info("No data to export")
         return
     
-    export_format = st.selectbox("Select Format", ["CSV", "Excel"])
+    export_format = st.selectbox("Select Format", ["CSV", "Parquet", "Excel"])
     
     if export_format == "CSV":
-        csv_data = sales_df.to_csv(index=False)
+        with admit_heavy("export_csv"):
+            csv_data = to_csv_bytes(sales_table)
         st.download_button(
             label="Download CSV",
             data=csv_data,
@@ -220,8 +260,20 @@ def render_export(db):
             use_container_width=True
         )
     
+    elif export_format == "Parquet":
+        with admit_heavy("export_parquet"):
+            parquet_data = to_parquet_bytes(sales_table)
+        st.download_button(
+            label="Download Parquet",
+            data=parquet_data,
+            file_name=f"sales_report_{datetime.now().strftime('%Y%m%d')}.parquet",
+            mime="application/vnd.apache.parquet",
+            use_container_width=True
+        )
+    
     else:
-        excel_data = sales_df.to_excel(index=False, engine="openpyxl")
+        with admit_heavy("export_excel"):
+            excel_data = to_excel_bytes(sales_table)
         st.download_button(
             label="Download Excel",
             data=excel_data,
@@ -230,7 +282,7 @@ def render_export(db):
             use_container_width=True
         )
     
-    st.info(f"Total records to export: {len(sales_df)}")
+    st.info(f"Total records to export: {sales_table.num_rows}")
 
 
 def get_user_id(db, username: str) -> int:
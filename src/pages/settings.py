@@ -1,5 +1,16 @@
 import streamlit as st
-from src.db import get_db, add_audit_log
+from datetime import date, timedelta
+from src.db import get_db, get_resource_usage
+from src import metrics
+from src.admission import admission
+from src.audit import audit_writer
+from src.cancellation import running_queries
+from src.charts import figure_cache
+from src.config import AUDIT_RETENTION_DAYS
+from src.maintenance import (
+    apply_audit_retention, checkpoint, cluster_audit_log, cluster_sales, database_files,
+    storage_stats, tier_closed_months, zone_map_pruning
+)
 
 
 def render_settings():
@@ -99,12 +110,83 @@ def render_maintenance_settings():
         if st.button("Clear Audit Logs", use_container_width=True):
             db = get_db()
             try:
-                db.execute("DELETE FROM audit_log WHERE created_at < CURRENT_DATE - INTERVAL 30 DAY")
-                db.commit()
-                st.success("Old audit logs cleared")
+                result = apply_audit_retention(db)
+                st.success(
+                    f"Dropped {len(result['dropped'])} audit partitions older than {AUDIT_RETENTION_DAYS} days, "
+                    f"reclaimed {result['bytes_reclaimed'] / 1024 / 1024:,.1f} MB"
+                )
             finally:
                 db.close()
     
+    st.markdown("<h4 style='margin-top: 2rem; margin-bottom: 1rem;'>Database Storage</h4>", unsafe_allow_html=True)
+    
+    files = database_files()
+    col1, col2 = st.columns(2)
+    col1.metric("Database File", f"{files['db_bytes'] / 1024 / 1024:,.1f} MB")
+    col2.metric("WAL", f"{files['wal_bytes'] / 1024 / 1024:,.1f} MB")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # Plain CHECKPOINT: FORCE would abort other sessions' open transactions
+        if st.button("Checkpoint", use_container_width=True,
+                     help="Skipped while other sessions are writing; try again later if the WAL does not shrink"):
+            db = get_db()
+            try:
+                st.success(f"Checkpointed: {format_size_change(checkpoint(db))}")
+            finally:
+                db.close()
+    
+    with col2:
+        # Compaction swaps the file under this process's open DuckDB instance, so it is CLI-only
+        st.caption(
+            "To reclaim free space, stop the dashboard and scheduler and run "
+            "`python scripts/data_sync.py compact`"
+        )
+    
+    with st.expander("Table Storage"):
+        db = get_db()
+        try:
+            st.dataframe(storage_stats(db), use_container_width=True, hide_index=True)
+        finally:
+            db.close()
+    
+    st.markdown("<h4 style='margin-top: 2rem; margin-bottom: 1rem;'>Storage Layout</h4>", unsafe_allow_html=True)
+    
+    if st.button("Cluster Sales by Date", use_container_width=True):
+        db = get_db()
+        try:
+            cutoff = date.today() - timedelta(days=90)
+            before = zone_map_pruning(db, "sales", "date", low=cutoff)
+            result = cluster_sales(db)
+            after = zone_map_pruning(db, "sales", "date", low=cutoff)
+            st.success(
+                f"Rewrote {result['rows']:,} sales rows in {result['seconds']:.1f}s. "
+                f"The 90-day manager filter now skips {after['skipped']} of {after['row_groups']} row groups "
+                f"(was {before['skipped']} of {before['row_groups']})"
+            )
+        finally:
+            db.close()
+    
+    if st.button("Cluster Audit Log by Time", use_container_width=True):
+        db = get_db()
+        try:
+            result = cluster_audit_log(db)
+            st.success(f"Rewrote {result['rows']:,} audit entries in {result['seconds']:.1f}s")
+        finally:
+            db.close()
+    
+    if st.button("Move Closed Months to Cold Storage", use_container_width=True):
+        db = get_db()
+        try:
+            result = tier_closed_months(db)
+            st.success(
+                f"Moved {result['rows']:,} sales rows into {len(result['partitions'])} Parquet partitions "
+                f"in {result['seconds']:.1f}s"
+            )
+        finally:
+            db.close()
+    
     st.markdown("<h4 style='margin-top: 2rem; margin-bottom: 1rem;'>System Information</h4>", unsafe_allow_html=True)
     
     import platform
@@ -118,11 +200,58 @@ def render_maintenance_settings():
         ]
     }
     
+    cache_stats = figure_cache.stats()
+    system_info["Figure Cache"] = [
+        f"Entries: {cache_stats['entries']:,} ({cache_stats['bytes'] / 1024 / 1024:.1f} / {cache_stats['max_bytes'] / 1024 / 1024:.0f} MB)",
+        f"Hit Rate: {cache_stats['hit_rate']:.0%} ({cache_stats['hits']:,} hits, {cache_stats['misses']:,} misses)",
+        f"Evictions: {cache_stats['evictions']:,}"
+    ]
+    
+    admission_metrics = metrics.snapshot()
+    queue_wait = admission_metrics["timings"].get("admission.queue_wait", {"avg": 0.0, "max": 0.0})
+    system_info["Query Admission"] = [
+        f"Running: {admission.running} / {admission.max_concurrent} heavy queries, {admission.queued} queued",
+        f"Queue Wait: {queue_wait['avg'] * 1000:,.0f} ms avg, {queue_wait['max'] * 1000:,.0f} ms max",
+        f"Rejected: {sum(v for k, v in admission_metrics['counters'].items() if k.startswith('admission.rejected'))}, "
+        f"Downgraded: {admission_metrics['counters'].get('admission.downgraded', 0)}",
+        f"Running Queries: {len(running_queries())}, Cancelled: "
+        f"{sum(v for k, v in admission_metrics['counters'].items() if k.startswith('queries.cancelled'))}"
+    ]
+    
+    audit_flush = admission_metrics["timings"].get("audit.flush", {"avg": 0.0})
+    system_info["Audit Writer"] = [
+        f"Pending: {audit_writer.pending:,} events, Flushed: {admission_metrics['counters'].get('audit.flushed', 0):,} "
+        f"({audit_flush['avg'] * 1000:,.0f} ms avg per batch), "
+        f"Failed Flushes: {admission_metrics['counters'].get('audit.flush_failed', 0)}"
+    ]
+    
+    db = get_db()
+    try:
+        usage = get_resource_usage(db)
+    finally:
+        db.close()
+    
+    system_info["DuckDB"] = [
+        f"Memory: {usage['memory_bytes'] / 1024 / 1024:,.1f} MB in use (limit {usage['settings']['memory_limit']})",
+        f"Threads: {usage['settings']['threads']}, Preserve Insertion Order: {usage['settings']['preserve_insertion_order']}",
+        f"Spill: {usage['temp_files']} files, {usage['temp_files_bytes'] / 1024 / 1024:,.1f} MB in "
+        f"{usage['settings']['temp_directory']} (limit {usage['settings']['max_temp_directory_size']})"
+    ]
+    
     for key, values in system_info.items():
         for value in values:
             st.caption(value)
 
 
+def format_size_change(result: dict) -> str:
+    before, after = result["before"], result["after"]
+    return (
+        f"file {before['db_bytes'] / 1024 / 1024:,.1f} → {after['db_bytes'] / 1024 / 1024:,.1f} MB, "
+        f"WAL {before['wal_bytes'] / 1024 / 1024:,.1f} → {after['wal_bytes'] / 1024 / 1024:,.1f} MB "
+        f"in {result['seconds']:.1f}s"
+    )
+
+
 def get_db():
     from src.db import get_db as get_db_conn
     return get_db_conn()
\ No newline at end of file
@@ -1,6 +1,11 @@
 import streamlit as st
 import pandas as pd
-from src.db import get_db, get_all_users, update_user_status, update_user_role, add_audit_log
+from datetime import datetime, time, timedelta
+from src.db import get_db, get_all_users, update_user_status, update_user_role, get_audit_logs, get_audit_filter_options
+from src.audit import log_event
+
+
+AUDIT_PAGE_SIZE = 50
 
 
 def render_users():
@@ -53,8 +58,7 @@ def render_users_list(db):
             
             if new_role != row['role']:
                 if update_user_role(db, row['id'], new_role):
-                    add_audit_log(
-                        db,
+                    log_event(
                         st.session_state.get('user_id', 1),
                         "UPDATE_ROLE",
                         "users",
@@ -77,8 +81,7 @@ def render_users_list(db):
             button_label = "Deactivate" if row['is_active'] else "Activate"
             if st.button(button_label, key=f"status_{row['id']}", use_container_width=True):
                 if update_user_status(db, row['id'], new_status):
-                    add_audit_log(
-                        db,
+                    log_event(
                         st.session_state.get('user_id', 1),
                         "UPDATE_STATUS",
                         "users",
@@ -95,19 +98,40 @@ def render_users_list(db):
 def render_user_activity(db):
     st.markdown("<h3 style='margin-bottom: 1rem;'>User Activity Log</h3>", unsafe_allow_html=True)
     
-    activity_query = """
-    SELECT 
-        u.username,
-        al.action,
-        al.table_name,
-        al.created_at
-    FROM audit_log al
-    JOIN users u ON al.user_id = u.id
-    ORDER BY al.created_at DESC
-    LIMIT 50
-    """
+    users_df = get_all_users(db)
+    options = get_audit_filter_options(db)
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        usernames = st.multiselect("User", users_df["username"].tolist(), key="audit_users")
+    
+    with col2:
+        actions = st.multiselect("Action", options["actions"], key="audit_actions")
+    
+    with col3:
+        table_names = st.multiselect("Table", options["table_names"], key="audit_tables")
+    
+    with col4:
+        date_range = st.date_input("Date Range", value=(), key="audit_dates")
     
-    activity_df = db.execute(activity_query).df()
+    user_ids = users_df.loc[users_df["username"].isin(usernames), "id"].tolist()
+    created_from = created_to = None
+    if len(date_range) == 2:
+        created_from = datetime.combine(date_range[0], time.min)
+        created_to = datetime.combine(date_range[1] + timedelta(days=1), time.min)
+    
+    # Cursors of the pages already visited; a filter change starts again from the newest entry
+    filters = (tuple(usernames), tuple(actions), tuple(table_names), tuple(date_range))
+    if st.session_state.get("audit_filters") != filters:
+        st.session_state.audit_filters = filters
+        st.session_state.audit_cursors = [None]
+    
+    cursors = st.session_state.audit_cursors
+    activity_df, next_cursor = get_audit_logs(
+        db, user_ids, actions, table_names, created_from, created_to,
+        cursor=cursors[-1], page_size=AUDIT_PAGE_SIZE
+    )
     
     if activity_df.empty:
         st.info("No activity recorded")
@@ -119,6 +143,21 @@ def render_user_activity(db):
         hide_index=True,
         height=400
     )
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col1:
+        if st.button("Newer", disabled=len(cursors) == 1, use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    
+    with col2:
+        st.caption(f"Page {len(cursors)}")
+    
+    with col3:
+        if st.button("Older", disabled=next_cursor is None, use_container_width=True):
+            cursors.append(next_cursor)
+            st.rerun()
 
 
 def get_user_id(db, username: str) -> int: